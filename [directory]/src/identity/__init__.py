@@ -1,13 +1,37 @@
-import logging
+import os
+import weakref
+from concurrent.futures import Future
+from typing import Optional
 
+from identity.cache import IdentityCache
 from identity.client import Client, client
 
-logger = logging.getLogger(__name__)
+UNKNOWN = "<unknown>"
+CACHE = IdentityCache(ttl=300, error_ttl=30)
 
 
-def get_display_name(client: Client = client) -> str:
-    try:
-        return client.get_me().display_name
-    except Exception as e:
-        logger.error(e)
-        return "<unknown>"
+def _key(client: Client, token: Optional[str]) -> tuple:
+    if token is None:
+        token = os.getenv("PARAPY_WEBAUTH_TOKEN", "")
+    # A weak reference is only equal to another one while the client is alive, unlike
+    # id(client), which a client created after this one was collected can reuse
+    return weakref.ref(client), token
+
+
+def prefetch_display_name(
+    client: Client = client, token: Optional[str] = None
+) -> Future:
+    """Starts looking up the display name in the background"""
+    return CACHE.prefetch(_key(client, token), lambda: client.get_me().display_name)
+
+
+def get_display_name(
+    client: Client = client,
+    token: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> str:
+    """The display name of the user with auth `token` (by default the token of this
+    environment). Waits at most `timeout` seconds for IAM, "<unknown>" if it is not
+    available (yet)."""
+    name = CACHE.get(_key(client, token), lambda: client.get_me().display_name, timeout)
+    return UNKNOWN if name is None else name
@@ -0,0 +1,89 @@
+"""
+Cache of identity lookups.
+
+Display names are cached per auth token for `ttl` seconds. Lookups run on a small
+thread pool: concurrent sessions with the same token share one IAM request, and a
+lookup can be started (prefetched) when a session connects, so it is usually done by
+the time the name is shown. A failed lookup is logged once and retried after
+`error_ttl` seconds. Expired lookups are dropped when a new one is started.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class IdentityCache:
+    def __init__(
+        self, ttl: float = 300, error_ttl: float = 30, max_workers: int = 2
+    ) -> None:
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="identity")
+        self._lock = threading.Lock()
+        self._futures: dict[Hashable, Future] = {}
+        self._expires: dict[Hashable, float] = {}
+        self._failing: set[Hashable] = set()
+
+    def prefetch(self, key: Hashable, fetch: Callable[[], str]) -> Future:
+        """Starts a lookup for `key` with `fetch`, unless one is cached or running"""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and not self._expired(key):
+                return future
+            self._evict()
+            future = self._executor.submit(self._fetch, key, fetch)
+            self._futures[key] = future
+            self._expires[key] = float("inf")  # while running
+            return future
+
+    def _expired(self, key: Hashable) -> bool:
+        return self._futures[key].done() and time.monotonic() >= self._expires[key]
+
+    def _evict(self) -> None:
+        """Drops the expired lookups, of all keys. A key stays in _failing until a
+        lookup succeeds, so a lasting failure is still only logged once."""
+        for key in [key for key in self._futures if self._expired(key)]:
+            del self._futures[key]
+            del self._expires[key]
+
+    def _fetch(self, key: Hashable, fetch: Callable[[], str]) -> str:
+        try:
+            value = fetch()
+        except Exception as e:
+            with self._lock:
+                self._expires[key] = time.monotonic() + self.error_ttl
+                first_failure = key not in self._failing
+                self._failing.add(key)
+            if first_failure:
+                logger.error("Identity lookup failed: %s", e)
+            raise
+        with self._lock:
+            self._expires[key] = time.monotonic() + self.ttl
+            self._failing.discard(key)
+        return value
+
+    def get(
+        self, key: Hashable, fetch: Callable[[], str], timeout: Optional[float] = None
+    ) -> Optional[str]:
+        """The value for `key`, waiting at most `timeout` seconds for the lookup.
+        None if it failed or is not done in time."""
+        future = self.prefetch(key, fetch)
+        try:
+            return future.result(timeout)
+        except Exception:
+            return None
+
+    def __len__(self) -> int:
+        """Number of cached and running lookups"""
+        return len(self._futures)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._futures.clear()
+            self._expires.clear()
+            self._failing.clear()
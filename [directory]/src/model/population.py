@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+"""Vectorized evaluation of a population of hot air balloons.
+
+The properties shown in the design space (volume, weight and cost) only depend on the
+inputs of a HotAirBalloon. Instead of building a ParaPy object with OCC geometry for
+every candidate, a Population keeps the inputs as columns and evaluates all candidates
+at once from the control points of the envelope profile."""
+
+# The envelope profile is a cubic B-spline through 5 control points with a clamped,
+# uniform knot vector (the default of parapy.geom.BSplineCurve)
+DEGREE = 3
+KNOTS = np.array([0, 0, 0, 0, 0.5, 1, 1, 1, 1], dtype=float)
+N_CONTROL_POINTS = len(KNOTS) - DEGREE - 1
+
+# Gauss-Legendre points per knot span. The volume integrand is a polynomial of degree 8
+# (exact from 5 points), the area integrand has a square root and needs a few more.
+N_GAUSS = 16
+
+# Inputs of a HotAirBalloon with their defaults, in the order of the columns
+INPUTS = {
+    "opening_radius": 0.5,
+    "radius": 5.0,
+    "half_height": 3.0,
+    "tube_height": 0.5,
+    "height": 10.0,
+    "basket_width": 2.0,
+    "basket_length": 2.0,
+    "rope_length": 2.0,
+}
+BOX_HEIGHT = 1.5  # Basket.box_height
+PROPERTIES = ("volume", "area", "box_volume", "weight", "cost")
+
+# Filter operators (those of the number columns of a MUI DataGrid) on a column
+FILTERS = {
+    "=": np.equal,
+    "!=": np.not_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "isAnyOf": np.isin,
+}
+
+
+def _filter_value(operator: str, value: Any) -> Any:
+    """The float value (a list for isAnyOf) of a filter, None if it is missing or
+    does not parse, e.g. "1e" while the value is being typed"""
+    try:
+        if operator == "isAnyOf":
+            return [float(v) for v in value] or None
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _basis(t: np.ndarray, degree: int = DEGREE, knots: np.ndarray = KNOTS):
+    """Values and derivatives of the B-spline basis functions at parameters `t`,
+    both of shape (len(t), n_control_points), using the Cox-de Boor recursion."""
+    t = np.asarray(t, dtype=float)
+    n_basis = len(knots) - 1
+    # degree 0, the last non-empty span is closed on the right to include t = 1
+    last = np.flatnonzero(knots[1:] > knots[:-1])[-1]
+    values = np.zeros((len(t), n_basis))
+    for i in range(n_basis):
+        upper = (t <= knots[i + 1]) if i == last else (t < knots[i + 1])
+        values[:, i] = (t >= knots[i]) & upper
+
+    derivatives = np.zeros_like(values)
+    for p in range(1, degree + 1):
+        n_basis -= 1
+        new_values = np.zeros((len(t), n_basis))
+        new_derivatives = np.zeros((len(t), n_basis))
+        for i in range(n_basis):
+            left = knots[i + p] - knots[i]
+            right = knots[i + p + 1] - knots[i + 1]
+            if left > 0:
+                new_values[:, i] += (t - knots[i]) / left * values[:, i]
+                new_derivatives[:, i] += p / left * values[:, i]
+            if right > 0:
+                new_values[:, i] += (knots[i + p + 1] - t) / right * values[:, i + 1]
+                new_derivatives[:, i] -= p / right * values[:, i + 1]
+        # only the derivative of the last degree is needed
+        values, derivatives = new_values, new_derivatives
+    return values, derivatives
+
+
+def _quadrature(n_gauss: int = N_GAUSS, knots: np.ndarray = KNOTS):
+    """Parameters and weights of Gauss-Legendre quadrature over every knot span"""
+    x, w = np.polynomial.legendre.leggauss(n_gauss)
+    spans = [(a, b) for a, b in zip(knots[:-1], knots[1:]) if b > a]
+    t = np.concatenate([(b - a) / 2 * x + (a + b) / 2 for a, b in spans])
+    weights = np.concatenate([(b - a) / 2 * w for a, b in spans])
+    return t, weights
+
+
+_T, _WEIGHTS = _quadrature()
+_N, _DN = _basis(_T)
+
+
+def profile_control_points(
+    opening_radius, tube_height, radius, half_height, height
+) -> tuple[np.ndarray, np.ndarray]:
+    """Radial (x) and axial (z) coordinates of the control points of the envelope
+    profiles, both of shape (n, 5). Mirrors HotAirBalloon.curve."""
+    opening_radius, tube_height, radius, half_height, height = (
+        np.atleast_1d(np.asarray(v, dtype=float))
+        for v in np.broadcast_arrays(
+            opening_radius, tube_height, radius, half_height, height
+        )
+    )
+    x = np.stack([opening_radius, opening_radius, radius, radius, 0 * radius], axis=1)
+    z = np.stack([0 * height, tube_height, half_height, height, height], axis=1)
+    return x, z
+
+
+def revolved_volume(x: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """Volume enclosed by revolving the profiles with control points `x`, `z` (n, 5)
+    around the z-axis: pi * integral of x^2 dz."""
+    r = x @ _N.T
+    dz = z @ _DN.T
+    return np.pi * (r**2 * dz) @ _WEIGHTS
+
+
+def revolved_area(x: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """Area of the surfaces of revolution of the profiles with control points `x`, `z`
+    (n, 5) around the z-axis: 2 * pi * integral of x ds."""
+    r = x @ _N.T
+    speed = np.hypot(x @ _DN.T, z @ _DN.T)
+    return 2 * np.pi * (r * speed) @ _WEIGHTS
+
+
+class Population:
+    """Inputs of a set of hot air balloons, stored as columns, with the properties of
+    all of them evaluated in one pass. Rows are turned into ParaPy objects with
+    `inputs(idx)`, only for the designs that are actually needed."""
+
+    def __init__(self, color: str = "red", **columns: Sequence[float]) -> None:
+        size = max((len(v) for v in columns.values()), default=0)
+        unknown = set(columns) - set(INPUTS)
+        if unknown:
+            raise ValueError(f"Unknown balloon inputs: {', '.join(sorted(unknown))}")
+
+        self.color = color
+        self.columns: dict[str, np.ndarray] = {
+            name: np.broadcast_to(
+                np.asarray(columns.get(name, default), dtype=float), (size,)
+            ).copy()
+            for name, default in INPUTS.items()
+        }
+        self.evaluate()
+
+    @classmethod
+    def random(
+        cls,
+        size: int,
+        height: Sequence[float],
+        radius: Sequence[float],
+        shape: Sequence[float],
+        color: str = "red",
+        rng: Optional[np.random.Generator] = None,
+    ) -> Population:
+        """`size` balloons with a height, radius and half height (shape) drawn
+        uniformly from the given [min, max] ranges"""
+        rng = np.random.default_rng() if rng is None else rng
+        return cls(
+            color=color,
+            radius=rng.uniform(radius[0], radius[1], size),
+            height=rng.uniform(height[0], height[1], size),
+            half_height=rng.uniform(shape[0], shape[1], size),
+        )
+
+    @classmethod
+    def from_models(cls, models: Sequence, color: Optional[str] = None) -> Population:
+        """Population with the inputs of existing HotAirBalloon objects"""
+        columns = {name: [getattr(model, name) for model in models] for name in INPUTS}
+        if color is None:
+            color = models[0].color if len(models) else "red"
+        return cls(color=color, **columns)
+
+    @classmethod
+    def concat(cls, populations: Sequence[Population]) -> Population:
+        """One population with the rows of `populations`, in order"""
+        return cls(
+            color=populations[0].color,
+            **{
+                name: np.concatenate([p.columns[name] for p in populations])
+                for name in INPUTS
+            },
+        )
+
+    def evaluate(self) -> None:
+        c = self.columns
+        x, z = profile_control_points(
+            c["opening_radius"],
+            c["tube_height"],
+            c["radius"],
+            c["half_height"],
+            c["height"],
+        )
+        self.volume = revolved_volume(x, z)
+        self.area = revolved_area(x, z)
+        self.box_volume = c["basket_width"] * c["basket_length"] * BOX_HEIGHT
+        self.weight = self.volume * 0.25
+        self.cost = (
+            self.area * 500 * (c["half_height"] / 5 + 1) + self.box_volume * 2000
+        )
+        self._orders: dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.columns["radius"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Input or property column `name`, or the row numbers for `index`"""
+        if name in self.columns:
+            return self.columns[name]
+        if name in PROPERTIES:
+            return getattr(self, name)
+        if name == "index":
+            return np.arange(len(self))
+        raise KeyError(name)
+
+    def order(self, name: str) -> np.ndarray:
+        """Rows sorted by column `name` (ascending). Computed once per column, so
+        paging through a sorted table does not sort again."""
+        if name not in self._orders:
+            self._orders[name] = np.argsort(self[name], kind="stable")
+        return self._orders[name]
+
+    def query(
+        self,
+        sort: Optional[str] = None,
+        descending: bool = False,
+        filters: Sequence[tuple[str, str, Any]] = (),
+        match_any: bool = False,
+    ) -> np.ndarray:
+        """Rows sorted by column `sort` that pass the (column, operator, value)
+        `filters`; all of them, or any of them if `match_any`. Filters with an unknown
+        operator or without a valid value are ignored, like an incomplete filter in a
+        DataGrid."""
+        rows = self.order(sort) if sort else np.arange(len(self))
+        if descending:
+            rows = rows[::-1]
+
+        masks = []
+        for name, operator, value in filters:
+            value = _filter_value(operator, value) if operator in FILTERS else None
+            if value is not None:
+                masks.append(FILTERS[operator](self[name], value))
+        if masks:
+            mask = (
+                np.logical_or.reduce(masks)
+                if match_any
+                else np.logical_and.reduce(masks)
+            )
+            rows = rows[mask[rows]]
+        return rows
+
+    def update_row(self, idx: int, inputs: dict) -> bool:
+        """Sets the inputs of row `idx` (e.g. of a refined design) and evaluates the
+        properties again. False if they did not change."""
+        changed = [
+            name for name in INPUTS if self.columns[name][idx] != float(inputs[name])
+        ]
+        for name in changed:
+            self.columns[name][idx] = inputs[name]
+        if changed:
+            self.evaluate()
+        return bool(changed)
+
+    def inputs(self, idx: int) -> dict:
+        """Inputs for the HotAirBalloon of row `idx`"""
+        return dict(
+            {name: float(column[idx]) for name, column in self.columns.items()},
+            color=self.color,
+        )
@@ -1,56 +1,172 @@
+import concurrent.futures
 import os
 import pathlib
+from typing import Callable, Optional
 
 from persistence.client import PRODUCTION_MODE, Client, client
+from persistence.columnar import ColumnarStoreModel
 from persistence.model import StoreModel
-from ui.store import STORE
+from persistence.chunks import ChunkStore
+from persistence.worker import SaveWorker
+from ui.store import SESSION_STORES, Store, current_store, on_change, using_store
 
 if PRODUCTION_MODE:
     PERSISTENCE_DIR = pathlib.Path.home() / ".parapy" / ".state"
 else:
     PERSISTENCE_DIR = pathlib.Path(__file__).parent.parent.parent / ".state"
-SAVE_FILENAME = "save.json"
-PERSISTENCE_DISABLED = PRODUCTION_MODE and not bool(os.getenv("PARAPY_APP_MODEL_ID"))
+SAVE_FILENAME = "save.zip"
+LEGACY_SAVE_FILENAME = "save.json"  # save file of the JSON format (version 1)
+# With session stores there is no key yet to tell the save files of the sessions
+# apart, so they would restore and overwrite each other's state
+PERSISTENCE_DISABLED = SESSION_STORES or (
+    PRODUCTION_MODE and not bool(os.getenv("PARAPY_APP_MODEL_ID"))
+)
+# Several processes of the app are not supported (each would have a store of its own),
+# but if uvicorn is started with more workers they all save to the same file
+SHARED_SAVE_FILE = int(os.getenv("WEB_CONCURRENCY", "1")) > 1
+# Seconds between automatic saves, no automatic saves if not set. A change of the
+# store is saved at most this long after it, see SaveWorker.autosave.
+AUTOSAVE_INTERVAL = float(os.getenv("PARAPY_APP_AUTOSAVE_INTERVAL", "0")) or None
 
 
-def load(client: Client = client, location: pathlib.Path = PERSISTENCE_DIR) -> bool:
-    with client.session(download_dir=location) as session:
-        if session.files.exists(SAVE_FILENAME):
-            session.files.download(SAVE_FILENAME, overwrite=True)
-        else:
+def serialize(location: pathlib.Path = PERSISTENCE_DIR) -> pathlib.Path:
+    location.mkdir(parents=True, exist_ok=True)
+    data_model_location = location / SAVE_FILENAME
+    ColumnarStoreModel.serialize(data_model_location, store=current_store())
+    return data_model_location
+
+
+def snapshot(location: pathlib.Path = PERSISTENCE_DIR) -> Optional[bytes]:
+    """The save file of the current state, None while a saved state is loading"""
+    store = current_store()
+    if store.is_loading:
+        return None
+    return serialize(location).read_bytes()
+
+
+def make_worker(chunks: ChunkStore) -> SaveWorker:
+    return SaveWorker(
+        lambda: snapshot(chunks.location),
+        chunks,
+        SAVE_FILENAME,
+        autosave_interval=AUTOSAVE_INTERVAL,
+        # the JSON save file of version 1 is replaced by the first save
+        obsolete=(LEGACY_SAVE_FILENAME,),
+        shared=SHARED_SAVE_FILE,
+    )
+
+
+# Saves and reports are stored as chunks, see persistence.chunks
+CHUNKS = ChunkStore(client, PERSISTENCE_DIR)
+WORKER = make_worker(CHUNKS)
+
+
+# Reads the population of a save file in the background, see load_header
+LOADER = concurrent.futures.ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="population-load"
+)
+
+
+def _autosave(store: Store) -> None:
+    with using_store(store):
+        WORKER.autosave()
+
+
+if not PERSISTENCE_DISABLED:
+    on_change(_autosave)
+
+
+def _chunks(client: Client, location: pathlib.Path) -> ChunkStore:
+    if client is CHUNKS.client and location == CHUNKS.location:
+        return CHUNKS
+    return ChunkStore(client, location)
+
+
+def load_header(
+    client: Client = client, location: pathlib.Path = PERSISTENCE_DIR
+) -> Optional[Callable[[Optional[float]], bool]]:
+    """Downloads the save file and restores everything but the population: the
+    settings, the step and the selected and final design. The population is read on
+    the LOADER thread meanwhile. Returns None if there is no save file, otherwise a
+    function that puts the population into the store, waiting at most `timeout`
+    seconds for the read. It returns False if the read is not done yet, so call it
+    again (on the thread of the session) until it returns True."""
+    chunks = _chunks(client, location)
+    downloaded = chunks.download(SAVE_FILENAME)
+    if downloaded is not None:
+        data_model_location, manifest = downloaded
+        if chunks is CHUNKS:
+            # the next save only uploads what changed compared to this file
+            WORKER.set_committed(manifest)
+    else:
+        with client.session(download_dir=location) as session:
+            if not session.files.exists(LEGACY_SAVE_FILENAME):
+                return None
+            session.files.download(LEGACY_SAVE_FILENAME, overwrite=True)
+        # the JSON format is loaded at once; it is replaced by the new format on the
+        # next save
+        _ = StoreModel.deserialize(
+            location / LEGACY_SAVE_FILENAME, store=current_store()
+        )
+        return lambda timeout=None: True
+
+    # the population is loaded into this store, also if the function is called from
+    # another context
+    store = current_store()
+    store.is_loading = True
+    header = ColumnarStoreModel.deserialize_header(data_model_location, store=store)
+    reading = LOADER.submit(ColumnarStoreModel.read_population, data_model_location)
+
+    def load_population(timeout: Optional[float] = None) -> bool:
+        concurrent.futures.wait([reading], timeout)
+        if not reading.done():
             return False
+        try:
+            ColumnarStoreModel.apply_population(reading.result(), header, store=store)
+        finally:
+            store.is_loading = False
+        return True
 
-    data_model_location = location / SAVE_FILENAME
+    return load_population
 
-    _ = StoreModel.deserialize(data_model_location, store=STORE)
 
+def load(client: Client = client, location: pathlib.Path = PERSISTENCE_DIR) -> bool:
+    load_population = load_header(client, location)
+    if load_population is None:
+        return False
+    load_population(None)
     return True
 
 
 def save(
     client: Client = client, location: pathlib.Path = PERSISTENCE_DIR
 ) -> pathlib.Path:
-    location.mkdir(parents=True, exist_ok=True)
-    data_model_location = location / SAVE_FILENAME
-
-    StoreModel.serialize(data_model_location, store=STORE)
-
-    with client.session() as session:
-        session.files.stage(
-            local_path=data_model_location,
-            remote_path=data_model_location.name,
-        )
-        session.commit()
-
+    """Saves the current state and waits for the upload, see WORKER for saving in
+    the background"""
+    chunks = _chunks(client, location)
+    worker = WORKER if chunks is CHUNKS else make_worker(chunks)
+    data_model_location = serialize(location)
+    # through the worker thread, which owns the committed manifest
+    worker.submit(data_model_location.read_bytes())
+    worker.wait()
+    if worker.status == "error":
+        raise worker.error
     return data_model_location
 
 
 def reset(client: Client = client, location: pathlib.Path = PERSISTENCE_DIR) -> None:
-    try:
-        (location / SAVE_FILENAME).unlink()
-    except FileNotFoundError:
-        pass
+    for filename in (SAVE_FILENAME, LEGACY_SAVE_FILENAME):
+        try:
+            (location / filename).unlink()
+        except FileNotFoundError:
+            pass
 
+    chunks = _chunks(client, location)
+    if chunks is CHUNKS:
+        # after the running and deferred uploads, so they do not restore the file
+        WORKER.set_committed(None)
+    chunks.delete(SAVE_FILENAME)
     with client.session() as session:
-        if session.files.exists(SAVE_FILENAME):
-            session.files.delete(SAVE_FILENAME)
+        if session.files.exists(LEGACY_SAVE_FILENAME):
+            session.files.delete(LEGACY_SAVE_FILENAME)
+        session.commit()
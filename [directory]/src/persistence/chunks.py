@@ -0,0 +1,196 @@
+"""
+Content-addressed, chunked file storage on top of the datastore client.
+
+A file is split into chunks at positions that depend on its content (where a rolling
+"gear" hash of the last 32 bytes has its top bits zero), not at fixed offsets. An edit
+therefore only changes the chunks around it, also when it inserts or removes bytes.
+Chunks are stored under the SHA-1 of their content, and a manifest lists the chunks of
+the file in order. An upload only stages the chunks that are not stored yet.
+
+An upload deletes the chunks of the previous manifest that the new one does not use.
+Uploads, downloads and deletes of a ChunkStore run one at a time, so a session does not
+delete the chunks of a file that another session is downloading or committing. Another
+process may still read a previous manifest, so for a file that is shared between
+processes the unused chunks are kept (``delete_unused=False``).
+
+Remote files of ``Report.pdf``::
+
+    Report.manifest.json   version, filename, size and the chunk digests
+    Report.chunk.<sha1>    one per distinct chunk
+"""
+
+import hashlib
+import json
+import pathlib
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+MANIFEST_VERSION = "2"
+MIN_CHUNK_SIZE = 2**11
+AVG_CHUNK_SIZE = 2**13  # a power of 2
+MAX_CHUNK_SIZE = 2**16
+
+# random, but fixed, values of the bytes for the gear hash
+GEAR = np.random.default_rng(20240607).integers(0, 2**32, 256, dtype=np.uint32)
+
+
+def cut_points(
+    data: bytes,
+    min_size: int = MIN_CHUNK_SIZE,
+    avg_size: int = AVG_CHUNK_SIZE,
+    max_size: int = MAX_CHUNK_SIZE,
+) -> list[int]:
+    """End positions of the content-defined chunks of `data`"""
+    values = GEAR[np.frombuffer(data, dtype=np.uint8)]
+    # gear hash h[i] = (h[i-1] << 1) + GEAR[data[i]] (mod 2**32), which is the sum of
+    # the values of the last 32 bytes, each shifted by its distance to i
+    hashes = values.copy()
+    for shift in range(1, 32):
+        hashes[shift:] += values[:-shift] << np.uint32(shift)
+    bits = avg_size.bit_length() - 1
+    mask = np.uint32(((1 << bits) - 1) << (32 - bits))
+    candidates = np.flatnonzero((hashes & mask) == 0) + 1
+
+    cuts = []
+    start = 0
+    for cut in candidates.tolist():
+        if cut - start < min_size:
+            continue
+        while cut - start > max_size:
+            start += max_size
+            cuts.append(start)
+        cuts.append(cut)
+        start = cut
+    while len(data) - start > max_size:
+        start += max_size
+        cuts.append(start)
+    if start < len(data):
+        cuts.append(len(data))
+    return cuts
+
+
+def split_chunks(data: bytes, **sizes: int) -> list[bytes]:
+    starts = [0, *cut_points(data, **sizes)]
+    return [data[a:b] for a, b in zip(starts[:-1], starts[1:])]
+
+
+class ChunkStore:
+    """Stores files as chunks through `client`; `location` is the local directory
+    used to stage and download them."""
+
+    def __init__(self, client, location: pathlib.Path) -> None:
+        self.client = client
+        self.location = location
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def manifest_filename(name: str) -> str:
+        return f"{pathlib.Path(name).stem}.manifest.json"
+
+    @staticmethod
+    def chunk_filename(name: str, digest: str) -> str:
+        return f"{pathlib.Path(name).stem}.chunk.{digest}"
+
+    def read_manifest(self, session, name: str) -> Optional[dict]:
+        """The committed manifest of file `name`, None if there is none. `session`
+        must download to `location`."""
+        filename = self.manifest_filename(name)
+        if not session.files.exists(filename):
+            return None
+        session.files.download(filename, overwrite=True)
+        return json.loads((self.location / filename).read_text())
+
+    def upload(
+        self,
+        name: str,
+        data: bytes,
+        previous: Optional[dict] = None,
+        progress: Optional[Callable[[float], None]] = None,
+        obsolete: tuple[str, ...] = (),
+        delete_unused: bool = True,
+    ) -> tuple[dict, int]:
+        """Stores `data` as file `name` and commits. Only chunks that are not in the
+        `previous` manifest (read from the datastore if not given) and not stored yet
+        are uploaded; chunks that are no longer used (unless not `delete_unused`) and
+        the `obsolete` remote files are deleted. Returns the new manifest and the
+        number of uploaded chunks."""
+        chunks = split_chunks(data)
+        digests = [hashlib.sha1(chunk).hexdigest() for chunk in chunks]
+        by_digest = dict(zip(digests, chunks))
+        manifest = dict(
+            version=MANIFEST_VERSION, filename=name, size=len(data), chunks=digests
+        )
+        self.location.mkdir(parents=True, exist_ok=True)
+
+        uploaded = 0
+        with self._lock, self.client.session(download_dir=self.location) as session:
+            if previous is None:
+                previous = self.read_manifest(session, name)
+            if manifest == previous:
+                return manifest, 0
+            known = set(previous["chunks"]) if previous else set()
+
+            new = [digest for digest in by_digest if digest not in known]
+            for idx, digest in enumerate(new):
+                remote_path = self.chunk_filename(name, digest)
+                if not session.files.exists(remote_path):
+                    local_path = self.location / remote_path
+                    local_path.write_bytes(by_digest[digest])
+                    session.files.stage(local_path=local_path, remote_path=remote_path)
+                    uploaded += 1
+                if progress is not None:
+                    progress((idx + 1) / (len(new) + 1))
+
+            unused = known - set(by_digest) if delete_unused else set()
+            for remote_path in [
+                *(self.chunk_filename(name, digest) for digest in unused),
+                *obsolete,
+            ]:
+                if session.files.exists(remote_path):
+                    session.files.delete(remote_path)
+
+            manifest_path = self.location / self.manifest_filename(name)
+            manifest_path.write_text(json.dumps(manifest))
+            session.files.stage(
+                local_path=manifest_path, remote_path=manifest_path.name
+            )
+            session.commit()
+
+        return manifest, uploaded
+
+    def download(self, name: str) -> Optional[tuple[pathlib.Path, dict]]:
+        """Puts file `name` together in `location` from its chunks, downloading the
+        chunks that are not on disk yet. Returns the file and its manifest, or None if
+        it is not stored."""
+        self.location.mkdir(parents=True, exist_ok=True)
+        with self._lock, self.client.session(download_dir=self.location) as session:
+            manifest = self.read_manifest(session, name)
+            if manifest is None:
+                return None
+            for digest in set(manifest["chunks"]):
+                filename = self.chunk_filename(name, digest)
+                if not (self.location / filename).exists():
+                    session.files.download(filename, overwrite=True)
+
+        path = self.location / name
+        with path.open("wb") as f:
+            for digest in manifest["chunks"]:
+                chunk_path = self.location / self.chunk_filename(name, digest)
+                f.write(chunk_path.read_bytes())
+        return path, manifest
+
+    def delete(self, name: str) -> None:
+        """Deletes file `name` and its chunks"""
+        self.location.mkdir(parents=True, exist_ok=True)
+        with self._lock, self.client.session(download_dir=self.location) as session:
+            manifest = self.read_manifest(session, name)
+            if manifest is None:
+                return
+            for digest in set(manifest["chunks"]):
+                filename = self.chunk_filename(name, digest)
+                if session.files.exists(filename):
+                    session.files.delete(filename)
+            session.files.delete(self.manifest_filename(name))
+            session.commit()
@@ -0,0 +1,181 @@
+"""
+Columnar save format of the Store.
+
+The population is stored as one compressed array of float64 values per balloon input
+in a zip file, instead of one JSON object per balloon. The selected and final design
+are stored in the header as their index in the population and their inputs, which may
+have changed after selection (e.g. in the refinement step). The header can be loaded
+on its own, so the designs are available before the population has been read. Arrays
+are written and read in chunks, so no copy of the whole file is built in memory.
+
+Layout of the zip file::
+
+    header.json           version, store settings, size and the designs
+    columns/<input>.f64   little-endian float64 values, one per balloon
+"""
+
+import json
+import pathlib
+import zipfile
+from typing import Optional
+
+import numpy as np
+from model.balloon import HotAirBalloon
+from model.population import INPUTS, Population
+from persistence.model import StoreModel, apply_store_settings, store_settings
+from ui.store import Store
+
+MODEL_VERSION = "2"
+HEADER = "header.json"
+COLUMN_DTYPE = np.dtype("<f8")
+CHUNK_SIZE = 2**16  # values per read or write
+
+
+def column_path(name: str) -> str:
+    return f"columns/{name}.f64"
+
+
+def _entry(path: str) -> zipfile.ZipInfo:
+    # a fixed timestamp, so that saving the same state gives the same bytes
+    info = zipfile.ZipInfo(path, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def _design(store: Store, model: Optional[HotAirBalloon]) -> Optional[dict]:
+    if model is None:
+        return None
+    return {
+        "index": store.index_of(model),
+        "inputs": {name: getattr(model, name) for name in INPUTS},
+    }
+
+
+def _restore_design(store: Store, design: Optional[dict]) -> Optional[HotAirBalloon]:
+    """Stand-alone balloon with the inputs of `design`"""
+    if design is None:
+        return None
+    return HotAirBalloon(color=store.color, **design["inputs"])
+
+
+def _attach_design(
+    store: Store, design: Optional[dict], model: Optional[HotAirBalloon]
+) -> Optional[HotAirBalloon]:
+    """The balloon of the population that `design` was, with the inputs of the
+    stand-alone `model` restored from it, or `model` itself if it was not part of
+    the population. The inputs are read from `model`, so changes made to it while
+    the population was loading are kept."""
+    if model is None or design is None or design["index"] is None:
+        return model
+    attached = store.models[design["index"]]
+    row = store.population.inputs(design["index"])
+    for name in design["inputs"]:
+        value = getattr(model, name)
+        if value != row[name]:
+            setattr(attached, name, value)
+    return attached
+
+
+def write_column(archive: zipfile.ZipFile, name: str, values: np.ndarray) -> None:
+    values = np.ascontiguousarray(values, dtype=COLUMN_DTYPE)
+    with archive.open(_entry(column_path(name)), "w") as f:
+        for start in range(0, len(values), CHUNK_SIZE):
+            f.write(values[start : start + CHUNK_SIZE].tobytes())
+
+
+def read_column(archive: zipfile.ZipFile, name: str, size: int) -> np.ndarray:
+    values = np.empty(size, dtype=COLUMN_DTYPE)
+    buffer = memoryview(values).cast("B")
+    step = CHUNK_SIZE * COLUMN_DTYPE.itemsize
+    with archive.open(column_path(name)) as f:
+        for start in range(0, len(buffer), step):
+            chunk = buffer[start : start + step]
+            if f.readinto(chunk) != len(chunk):
+                raise ValueError(f"Column {name!r} has fewer than {size} values")
+    return values
+
+
+class ColumnarStoreModel:
+    @classmethod
+    def serialize(cls, location: pathlib.Path, *, store: Store) -> None:
+        store.sync_models()
+        population = store.population
+        header = dict(
+            version=MODEL_VERSION,
+            settings=store_settings(store),
+            size=0 if population is None else len(population),
+            population_color=None if population is None else population.color,
+            selected=_design(store, store.selected),
+            final_design=_design(store, store.final_design),
+        )
+
+        with zipfile.ZipFile(location, "w", compression=zipfile.ZIP_DEFLATED) as f:
+            if population is not None:
+                for name in INPUTS:
+                    write_column(f, name, population[name])
+            # the header changes most often, at the end it only changes the last
+            # blocks of the file
+            f.writestr(_entry(HEADER), json.dumps(header))
+
+    @classmethod
+    def read_header(cls, location: pathlib.Path) -> dict:
+        with zipfile.ZipFile(location) as f:
+            return json.loads(f.read(HEADER))
+
+    @classmethod
+    def read_population(cls, location: pathlib.Path) -> Optional[Population]:
+        with zipfile.ZipFile(location) as f:
+            header = json.loads(f.read(HEADER))
+            if header["population_color"] is None:
+                return None
+            columns = {
+                name: read_column(f, name, header["size"])
+                for name in INPUTS
+                if column_path(name) in f.namelist()
+            }
+        return Population(color=header["population_color"], **columns)
+
+    @classmethod
+    def deserialize(
+        cls, location: pathlib.Path, *, store: Optional[Store] = None
+    ) -> Store:
+        if store is None:
+            store = Store()
+
+        if not zipfile.is_zipfile(location):
+            # a save file of the JSON format, from before version 2
+            return StoreModel.deserialize(location, store=store)
+
+        header = cls.deserialize_header(location, store=store)
+        cls.deserialize_population(location, header, store=store)
+        return store
+
+    @classmethod
+    def deserialize_header(cls, location: pathlib.Path, *, store: Store) -> dict:
+        """Restores the settings, step and designs of `store`. The designs are
+        stand-alone balloons until deserialize_population has been called."""
+        header = cls.read_header(location)
+        apply_store_settings(store, header["settings"])
+        store.selected = _restore_design(store, header["selected"])
+        store.final_design = _restore_design(store, header["final_design"])
+        return header
+
+    @classmethod
+    def deserialize_population(
+        cls, location: pathlib.Path, header: dict, *, store: Store
+    ) -> None:
+        """Restores the population of `store`, and makes the designs that were part
+        of it point to their balloon in the population again"""
+        cls.apply_population(cls.read_population(location), header, store=store)
+
+    @classmethod
+    def apply_population(
+        cls, population: Optional[Population], header: dict, *, store: Store
+    ) -> None:
+        """deserialize_population with a population that has been read already, e.g.
+        on another thread: read_population does not touch the store"""
+        store.replace_models(population)
+        store.selected = _attach_design(store, header["selected"], store.selected)
+        store.final_design = _attach_design(
+            store, header["final_design"], store.final_design
+        )
@@ -2,13 +2,36 @@ import json
 import pathlib
 from typing import List, Optional
 
+import numpy as np
 from model.balloon import HotAirBalloon
+from model.population import INPUTS, Population
 from parapy.core.datamodel import DataModel
 from ui.store import Store
 
 MODEL_VERSION = "1"
 
 
+def store_settings(store: Store) -> dict:
+    """The configuration and step of `store`, which are not part of a DataModel"""
+    return dict(
+        step=store.step,
+        pop_size=store.pop_size,
+        height=store.height,
+        radius=store.radius,
+        shape=store.shape,
+        color=store.color,
+    )
+
+
+def apply_store_settings(store: Store, settings: dict) -> None:
+    store.step = settings["step"]
+    store.pop_size = settings["pop_size"]
+    store.height = settings["height"]
+    store.radius = settings["radius"]
+    store.shape = settings["shape"]
+    store.color = settings["color"]
+
+
 class HotAirBalloonModel(DataModel):
     opening_radius: float
     radius: float
@@ -26,6 +49,26 @@ class HotAirBalloonModel(DataModel):
         field_lazy = False
 
 
+def _restore_design(
+    store: Store, design: Optional[HotAirBalloonModel]
+) -> Optional[HotAirBalloon]:
+    """The balloon of the population with the inputs of `design`, which was one of
+    the models when it was saved, or a stand-alone balloon if there is none"""
+    if design is None:
+        return None
+    inputs = {name: getattr(design, name) for name in INPUTS}
+    population = store.population
+    if population is not None:
+        rows = np.flatnonzero(
+            np.logical_and.reduce(
+                [population[name] == value for name, value in inputs.items()]
+            )
+        )
+        if len(rows):
+            return store.models[int(rows[0])]
+    return HotAirBalloon(color=design.color, **inputs)
+
+
 class StoreModel(DataModel):
     _custom_dump_key = "_custom_"
 
@@ -42,14 +85,7 @@ class StoreModel(DataModel):
         model = cls.from_base(store)
         model_dct = model.dump(version=MODEL_VERSION)
 
-        model_dct["data"][cls._custom_dump_key] = dict(
-            step=store.step,
-            pop_size=store.pop_size,
-            height=store.height,
-            radius=store.radius,
-            shape=store.shape,
-            color=store.color,
-        )
+        model_dct["data"][cls._custom_dump_key] = store_settings(store)
 
         with location.open("w") as f:
             json.dump(model_dct, f)
@@ -64,18 +100,12 @@ class StoreModel(DataModel):
         with location.open("r") as f:
             model_dct = json.load(f)
 
-        custom_dump = model_dct["data"].pop(cls._custom_dump_key)
-        store.step = custom_dump["step"]
-        store.pop_size = custom_dump["pop_size"]
-        store.height = custom_dump["height"]
-        store.radius = custom_dump["radius"]
-        store.shape = custom_dump["shape"]
-        store.color = custom_dump["color"]
+        apply_store_settings(store, model_dct["data"].pop(cls._custom_dump_key))
 
         model = cls.load(model_dct)
-        store.selected = HotAirBalloon()
-        store.final_design = HotAirBalloon()
-        store.models.quantify = len(model.models)
-        model.to_base(store)
+        # the models follow the population, which is replaced in one go
+        store.replace_models(Population.from_models(model.models, color=store.color))
+        store.selected = _restore_design(store, model.selected)
+        store.final_design = _restore_design(store, model.final_design)
 
         return store
@@ -0,0 +1,207 @@
+"""
+Background saving of the application state.
+
+A save takes a snapshot of the store (the bytes of the save file) on the calling thread,
+which is cheap, and hands it to a worker thread that uploads it to a ChunkStore. Only
+the chunks that are not part of the last committed manifest are uploaded, so a save
+costs bandwidth in proportion to what changed.
+
+Saves requested while an upload is running are coalesced: only the latest snapshot is
+uploaded next. Snapshots are only taken by `request` and `autosave`, never on the worker
+thread, so the store is not serialized while a session changes it. With an
+`autosave_interval`, `autosave` is called on every change of the store (see
+ui.store.on_change); its snapshot is uploaded once the interval since the last upload
+has passed, unless a newer snapshot replaces it before then.
+"""
+
+import logging
+import threading
+import time
+import weakref
+from typing import Callable, Optional
+
+from persistence.chunks import ChunkStore
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[["SaveWorker"], None]
+
+
+class SaveWorker:
+    """Uploads snapshots of the store on a background thread.
+
+    `snapshot` returns the bytes of the save file, or None if there is nothing to
+    save. `status` is one of "idle", "pending", "saving", "saved" or "error" and
+    `progress` is the fraction of the current upload that is done. Listeners added
+    with `subscribe` are called (with the worker) on every change of either; the
+    listener passed to `request` only on the changes of the upload of that request.
+    Listeners are called on the worker thread. If the file is `shared` with other
+    processes, the manifest they committed is read before every upload, instead of
+    relying on the last one of this worker, and chunks are never deleted: another
+    process may still be reading them."""
+
+    def __init__(
+        self,
+        snapshot: Callable[[], Optional[bytes]],
+        chunks: ChunkStore,
+        filename: str,
+        autosave_interval: Optional[float] = None,
+        obsolete: tuple[str, ...] = (),
+        shared: bool = False,
+    ) -> None:
+        self.snapshot = snapshot
+        self.chunks = chunks
+        self.filename = filename
+        self.autosave_interval = autosave_interval
+        self.obsolete = obsolete  # remote files replaced by the manifest
+        self.shared = shared
+
+        self.status = "idle"
+        self.progress = 0.0
+        self.error: Optional[Exception] = None
+        self.uploaded_chunks = 0  # number of chunks uploaded by the last save
+        self.committed: Optional[dict] = None  # manifest of the last save
+
+        self._pending: Optional[bytes] = None
+        # listeners of the requests whose snapshot is pending
+        self._waiting: list[Listener] = []
+        # time at which the pending snapshot is uploaded, later for an autosave
+        self._due = 0.0
+        self._last_upload = time.monotonic()
+        self._condition = threading.Condition()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._listeners: list[weakref.ref] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, listener: Listener) -> None:
+        """Calls `listener` on a change of status or progress. Only a weak reference
+        is kept, so listeners of closed sessions go away by themselves."""
+        ref = weakref.WeakMethod if hasattr(listener, "__self__") else weakref.ref
+        self._listeners.append(ref(listener))
+
+    def _notify(self, listeners: list[Listener]) -> None:
+        self._listeners = [ref for ref in self._listeners if ref() is not None]
+        for listener in [ref() for ref in self._listeners] + listeners:
+            if listener is not None:
+                try:
+                    listener(self)
+                except Exception:
+                    logger.exception("Save listener failed")
+
+    def _set_status(
+        self,
+        status: str,
+        progress: Optional[float] = None,
+        listeners: Optional[list[Listener]] = None,
+    ) -> None:
+        self.status = status
+        if progress is not None:
+            self.progress = progress
+        self._notify(listeners or [])
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="save-worker", daemon=True
+            )
+            self._thread.start()
+
+    def request(self, listener: Optional[Listener] = None) -> bool:
+        """Saves the current state in the background. False if there is nothing to
+        save."""
+        data = self.snapshot()
+        if data is None:
+            return False
+        self.submit(data, listener)
+        return True
+
+    def submit(
+        self,
+        data: bytes,
+        listener: Optional[Listener] = None,
+        deferred: bool = False,
+    ) -> None:
+        """Uploads the save file `data` in the background. A `deferred` upload waits
+        until autosave_interval has passed since the last upload."""
+        with self._condition:
+            if not deferred:
+                self._due = time.monotonic()
+            elif self._pending is None:
+                self._due = self._last_upload + (self.autosave_interval or 0.0)
+            # replaces a snapshot whose upload has not started yet
+            self._pending = data
+            self._idle.clear()
+            listeners = [listener] if listener is not None else []
+            self._waiting.extend(listeners)
+            # before the worker can take the snapshot, so "pending" always comes
+            # before the "saving" and "saved" of its upload
+            self._set_status("pending", 0.0, listeners)
+            self._condition.notify()
+        self.start()
+
+    def autosave(self) -> bool:
+        """Saves the current state at most once per autosave_interval. Call it from
+        the thread of a session when the state changes: the snapshot is taken now,
+        its upload is deferred. False if there is nothing to save."""
+        if self.autosave_interval is None:
+            return False
+        data = self.snapshot()
+        if data is None:
+            return False
+        self.submit(data, deferred=True)
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits until all requested saves are uploaded, a deferred one right away"""
+        with self._condition:
+            self._due = min(self._due, time.monotonic())
+            self._condition.notify()
+        return self._idle.wait(timeout)
+
+    def _next(self) -> tuple[bytes, list[Listener]]:
+        with self._condition:
+            while self._pending is None or time.monotonic() < self._due:
+                timeout = (
+                    None if self._pending is None else self._due - time.monotonic()
+                )
+                self._condition.wait(timeout)
+            data, self._pending = self._pending, None
+            self._last_upload = time.monotonic()
+            listeners, self._waiting = self._waiting, []
+            return data, listeners
+
+    def _run(self) -> None:
+        while True:
+            data, listeners = self._next()
+            self._set_status("saving", 0.0, listeners)
+            try:
+                self.upload(data, listeners)
+            except Exception as e:
+                logger.exception("Saving failed")
+                self.error = e
+                self._set_status("error", None, listeners)
+            else:
+                self.error = None
+                self._set_status("saved", 1.0, listeners)
+            with self._condition:
+                if self._pending is None:
+                    self._idle.set()
+
+    def upload(self, data: bytes, listeners: Optional[list[Listener]] = None) -> None:
+        """Uploads the chunks of `data` that changed since the last save and commits
+        the new manifest. Runs on the worker thread, see `submit`."""
+        self.committed, self.uploaded_chunks = self.chunks.upload(
+            self.filename,
+            data,
+            previous=None if self.shared else self.committed,
+            progress=lambda fraction: self._set_status("saving", fraction, listeners),
+            obsolete=self.obsolete,
+            delete_unused=not self.shared,
+        )
+
+    def set_committed(self, manifest: Optional[dict]) -> None:
+        """Sets the manifest the next upload is compared with, after the running
+        uploads, so it is not overwritten by one of them"""
+        self.wait()
+        self.committed = manifest
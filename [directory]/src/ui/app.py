@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Optional
+import concurrent.futures
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
-from identity import get_display_name
+from identity import prefetch_display_name
 from parapy.webgui import mui
 from parapy.webgui.core import Component, State
 from parapy.webgui.core.websocket.dispatchers import (
@@ -10,24 +11,40 @@ from parapy.webgui.core.websocket.dispatchers import (
     register_post_patch_action,
 )
 from parapy.webgui.mui.themes import DefaultTheme
-from persistence import PERSISTENCE_DISABLED, load
+from persistence import PERSISTENCE_DISABLED, load_header
 from ui.components.root import Root
+from ui.store import (
+    DEFAULT_STORE,
+    SESSION_STORES,
+    Store,
+    activate_store,
+    using_store,
+)
 
 if TYPE_CHECKING:
     from parapy.webgui.core.node import DiffStruct, NodeType
 
 
+# Seconds the session waits per patch for a background task (the population read or
+# the IAM lookup), before it checks again after the next patch
+POLL_INTERVAL = 0.1
+
+
 class App(Component):
-    _current_user: Optional[str] = None
+    current_user: str = State("")
     is_loading: bool = State(False)
     show_welcome_msg: bool = State(True)
     show_loaded_msg: bool = State(False)
 
-    @property
-    def current_user(self) -> str:
-        if self._current_user is None:
-            self._current_user = get_display_name()
-        return self._current_user
+    def on_identity(self) -> None:
+        """Shows the display name once the lookup started by mount_node is done. No
+        name (and no welcome message) if the lookup failed."""
+        concurrent.futures.wait([self.identity], POLL_INTERVAL)
+        if not self.identity.done():
+            register_post_patch_action(self.on_identity)
+            patch_layout()
+        elif self.identity.exception() is None:
+            self.current_user = self.identity.result()
 
     def on_load(self) -> None:
         if PERSISTENCE_DISABLED:
@@ -35,11 +52,26 @@ class App(Component):
 
         self.is_loading = True
         patch_layout()
-        from time import sleep
-
-        sleep(0.5)
-        self.show_loaded_msg = load()
+        with using_store(self.store):
+            load_population = load_header()
         self.is_loading = False
+        if load_population is None:
+            return
+
+        # The step and designs are restored, so the UI can be shown. The population
+        # is read in the background and put into the store after the next patches,
+        # its balloons are only instantiated when needed.
+        self.show_loaded_msg = True
+        register_post_patch_action(lambda: self.load_population(load_population))
+
+    def load_population(
+        self, load_population: Callable[[Optional[float]], bool]
+    ) -> None:
+        """Puts the population into the store if it has been read, otherwise tries
+        again after the next patch"""
+        if not load_population(POLL_INTERVAL):
+            register_post_patch_action(lambda: self.load_population(load_population))
+            patch_layout()
 
     def on_welcome_snackbar_close(self, *args: Any) -> None:
         self.show_welcome_msg = False
@@ -48,7 +80,15 @@ class App(Component):
         self.show_loaded_msg = False
 
     def mount_node(self) -> DiffStruct:
+        # With session stores, every session (websocket connection) gets a new store.
+        # Otherwise all sessions of the app share the default store, restored
+        # from the save file by on_load.
+        self.store = Store() if SESSION_STORES else DEFAULT_STORE
+        activate_store(self.store)
+        # the IAM lookup runs in the background while the page is rendered
+        self.identity = prefetch_display_name()
         register_post_patch_action(self.on_load)
+        register_post_patch_action(self.on_identity)
         return super().mount_node()
 
     def render(self) -> NodeType:
@@ -66,7 +106,7 @@ class App(Component):
                 ]
             ],
             mui.Snackbar(
-                open=self.show_welcome_msg,
+                open=self.show_welcome_msg and bool(self.current_user),
                 onClose=self.on_welcome_snackbar_close,
                 autoHideDuration=5000,
                 anchorOrigin={"vertical": "top", "horizontal": "center"},
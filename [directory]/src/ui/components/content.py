@@ -36,7 +36,7 @@ class Content(Component):
 
         steps_disabled = [
             False,
-            not STORE.models,
+            STORE.population is None,
             STORE.final_design is None,
             STORE.final_design is None,
         ]
@@ -1,21 +1,29 @@
 from __future__ import annotations
 
+import queue
 from typing import TYPE_CHECKING, Any
 
 from parapy.webgui import mui
 from parapy.webgui.app_bar import AppBar
 from parapy.webgui.core import Component, State
-from parapy.webgui.core.websocket.dispatchers import patch_layout
+from parapy.webgui.core.websocket.dispatchers import (
+    patch_layout,
+    register_post_patch_action,
+)
 from parapy.webgui.layout import Box, MarginRight
-from persistence import PERSISTENCE_DISABLED, reset, save
+from persistence import PERSISTENCE_DISABLED, WORKER, reset
 from ui.store import STORE
 
 if TYPE_CHECKING:
     from parapy.webgui.core.node import NodeType
 
+# Seconds the session waits for an update of the save progress per patch
+SAVE_POLL_INTERVAL = 0.1
+
 
 class Header(Component):
     is_saving: bool = State(False)
+    save_progress: float = State(0)
     is_resetting: bool = State(False)
     side_bar: bool = State(False)
     snackbar_msg: str = State("")
@@ -24,13 +32,36 @@ class Header(Component):
         if PERSISTENCE_DISABLED:
             return
 
+        # The upload runs on the worker thread, which only queues its progress. The
+        # queue is followed after the patches, in the context of this session.
+        updates: queue.SimpleQueue = queue.SimpleQueue()
+        if not WORKER.request(lambda w: updates.put((w.status, w.progress))):
+            return
         self.is_saving = True
-        patch_layout()
-        from time import sleep
+        self.save_progress = 0
+        register_post_patch_action(lambda: self.follow_save(updates))
+
+    def follow_save(self, updates: queue.SimpleQueue) -> None:
+        """Shows the progress of the save so far, and follows it again after the next
+        patch until the save is done. Only waits SAVE_POLL_INTERVAL for an update, so
+        the session keeps handling its events during the upload."""
+        status = None
+        try:
+            status, self.save_progress = updates.get(timeout=SAVE_POLL_INTERVAL)
+            while status not in ("saved", "error"):
+                status, self.save_progress = updates.get_nowait()
+        except queue.Empty:
+            pass
+        if status not in ("saved", "error"):
+            register_post_patch_action(lambda: self.follow_save(updates))
+            patch_layout()
+            return
 
-        sleep(0.5)
-        save()
         self.is_saving = False
+        if status == "saved":
+            self.snackbar_msg = "Saved application state!"
+        else:
+            self.snackbar_msg = "Saving the application state failed"
 
     def show_side_bar(self, *args: Any) -> None:
         self.side_bar = True
@@ -74,7 +105,7 @@ class Header(Component):
             ],
             mui.ListItem(disablePadding=True)[
                 mui.ListItemButton(
-                    disabled=not STORE.models,
+                    disabled=STORE.population is None,
                     onClick=lambda evt: self.select_step(1),
                 )[
                     mui.ListItemIcon[mui.Icon("assignment_turned_in_icon")],
@@ -163,6 +194,12 @@ class Header(Component):
                     ]
                 ]
             ],
+            mui.LinearProgress(
+                variant="determinate",
+                value=self.save_progress * 100,
+                color="secondary",
+                style={"visibility": "visible" if self.is_saving else "hidden"},
+            ),
             mui.Fab(
                 onClick=self.show_side_bar,
                 size="small",
@@ -8,8 +8,7 @@ from parapy.webgui.core import Component, get_asset_url, get_assets_dir
 from parapy.webgui.core.actions import download_file
 from parapy.webgui.layout import Box, MarginTop
 from parapy.webgui.layout.core.sizing import VerticalScroll
-from persistence import PERSISTENCE_DISABLED
-from persistence.client import client
+from persistence import CHUNKS, PERSISTENCE_DISABLED
 from ui.components.cost_graph import CostGraph
 from ui.components.property_table import PropertyTable
 from ui.store import STORE
@@ -24,12 +23,12 @@ class ReportingStep(Component):
             return
 
         report_location = Path(get_assets_dir()) / "Report.pdf"
-        with client.session() as session:
-            session.files.stage(
-                local_path=report_location,
-                remote_path=report_location.name,
-            )
-            session.commit()
+        # only the chunks that changed since the last upload are sent
+        CHUNKS.upload(
+            report_location.name,
+            report_location.read_bytes(),
+            obsolete=(report_location.name,),  # the whole file of earlier versions
+        )
 
     def content(self) -> NodeType:
         model = STORE.final_design
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any, Optional
 
+import numpy as np
 from parapy.webgui import mui, plotly, viewer
 from parapy.webgui.core import Component, State
 from parapy.webgui.core.websocket.dispatchers import register_post_patch_action
@@ -10,17 +11,49 @@ from ui.components.property_table import PropertyTable
 from ui.store import STORE
 
 if TYPE_CHECKING:
+    from model.population import Population
     from parapy.webgui.core.node import DiffStruct, NodeType
     from parapy.webgui.core.types import Event
 
+# Above this number of balloons, the design space plot draws one balloon per cell of
+# a PLOT_BINS x PLOT_BINS grid
+MAX_PLOT_POINTS = 5000
+PLOT_BINS = 100
+
+
+def decimate(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: int = MAX_PLOT_POINTS,
+    bins: int = PLOT_BINS,
+) -> np.ndarray:
+    """Indices of the points to draw: all of them up to `max_points` points, otherwise
+    the first point in every occupied cell of a `bins` x `bins` grid over the data"""
+    if len(x) <= max_points:
+        return np.arange(len(x))
+
+    def cell(v: np.ndarray) -> np.ndarray:
+        span = (v.max() - v.min()) or 1
+        return np.minimum(((v - v.min()) / span * bins).astype(int), bins - 1)
+
+    _, first = np.unique(cell(x) * bins + cell(y), return_index=True)
+    return np.sort(first)
+
 
 class SelectionStep(Component):
+    _population_trace: Optional[tuple[Population, dict]] = None
     selected: Optional[int] = State(None)
     is_evaluating: bool = State(False)
 
+    # Datagrid state. Sorting, filtering and paging are done on the server, so only
+    # the rows of the current page are sent to the client
+    pagination_model: dict = State({"page": 0, "pageSize": 25})
+    sort_model: list = State([])
+    filter_model: dict = State({"items": []})
+
     # Static columns used for a datagrid
     cols = [
-        {"field": "id", "headerName": "ID", "width": 90},
+        {"field": "id", "headerName": "ID", "width": 90, "type": "number"},
         {
             "field": "height",
             "headerName": "Height",
@@ -53,51 +86,115 @@ class SelectionStep(Component):
         },
     ]
 
-    def datagrid_data(self):
-        return [
-            {
-                "id": idx,
-                "height": model.height,
-                "radius": model.radius,
-                "volume": model.volume,
-                "weight": model.weight,
-                "cost": model.cost,
-            }
-            for idx, model in enumerate(STORE.models)
+    @staticmethod
+    def _column(field: str) -> str:
+        # the "id" of a row is its index in the population
+        return "index" if field == "id" else field
+
+    def datagrid_data(self) -> tuple[list[dict], int]:
+        """Rows of the current page and the number of rows after filtering"""
+        population = STORE.population
+        if population is None:
+            return [], 0
+
+        sort = self.sort_model[0] if self.sort_model else None
+        filters = [
+            (self._column(item["field"]), item.get("operator"), item.get("value"))
+            for item in self.filter_model.get("items", [])
         ]
+        rows = population.query(
+            sort=self._column(sort["field"]) if sort else None,
+            descending=bool(sort) and sort.get("sort") == "desc",
+            filters=filters,
+            match_any=self.filter_model.get("logicOperator") == "or",
+        )
+
+        page_size = self.pagination_model["pageSize"]
+        start = self.pagination_model["page"] * page_size
+        page = rows[start : start + page_size]
+        fields = [col["field"] for col in self.cols[1:]]
+        columns = [population[field][page].tolist() for field in fields]
+        return [
+            {"id": idx, **dict(zip(fields, row))}
+            for idx, row in zip(page.tolist(), zip(*columns))
+        ], len(rows)
+
+    def set_pagination_model(self, model: dict, *args: Any) -> None:
+        self.pagination_model = model
+
+    def set_sort_model(self, model: list, *args: Any) -> None:
+        self.sort_model = model
+        self.pagination_model = {**self.pagination_model, "page": 0}
+
+    def set_filter_model(self, model: dict, *args: Any) -> None:
+        self.filter_model = model
+        self.pagination_model = {**self.pagination_model, "page": 0}
+
+    def regenerate(self, evt: Event) -> None:
+        STORE.create_models()
+        # the rows of the new population start at its first page
+        self.pagination_model = {**self.pagination_model, "page": 0}
 
     def create_data(self) -> None:
         STORE.create_models()
         self.is_evaluating = False
 
     def mount_node(self) -> DiffStruct:
-        if not STORE.models:
+        if STORE.population is not None:
+            # show the designs as they were refined in the next steps
+            STORE.sync_models()
+        if STORE.population is None and not STORE.is_loading:
             # We instruct the WebGUI to run a function after this Component
             # has been loaded. We do this so that the loading of the page is
             # not slowed down by this 'slow' function
             register_post_patch_action(self.create_data)
         return super().mount_node()
 
-    def design_space_plot(self) -> NodeType:
-        models = STORE.models
-        selected = STORE.selected
-        data = [
-            {
-                "x": [balloon.cost / 1000 for balloon in models],
-                "y": [balloon.weight for balloon in models],
+    def population_trace(self, population: Population) -> dict:
+        """WebGL trace with (a decimated set of) all balloons. It is only rebuilt
+        when the properties of the population change (a new population or a refined
+        design), so selecting a balloon does not change it and it is not sent to the
+        client again."""
+        cached = self._population_trace
+        # Population.evaluate replaces the property arrays
+        if cached is None or cached[0] is not population.cost:
+            x, y = population.cost / 1000, population.weight
+            idx = decimate(x, y)
+            trace = {
+                "x": x[idx].tolist(),
+                "y": y[idx].tolist(),
+                "customdata": idx.tolist(),
                 "mode": "markers",
-                "type": "scatter",
-                "marker": {
-                    "color": ["red" if b is selected else "blue" for b in models],
-                    "size": [16 if b is selected else 8 for b in models],
-                },
+                "type": "scattergl",
+                "marker": {"color": "blue", "size": 8},
             }
-        ]
+            self._population_trace = cached = (population.cost, trace)
+        return cached[1]
+
+    def design_space_plot(self) -> NodeType:
+        population = STORE.population
+        selected = STORE.index_of(STORE.selected)
+        data = []
+        if population is not None:
+            data.append(self.population_trace(population))
+            # the selected balloon is a separate trace on top
+            points = [] if selected is None else [selected]
+            data.append(
+                {
+                    "x": (population.cost[points] / 1000).tolist(),
+                    "y": population.weight[points].tolist(),
+                    "customdata": points,
+                    "mode": "markers",
+                    "type": "scattergl",
+                    "marker": {"color": "red", "size": 16},
+                }
+            )
 
         layout = {
             "xaxis": {"title": "Balloon cost [x1,000 $] ", "fixedrange": True},
             "yaxis": {"title": "Max weight [kg]", "fixedrange": True},
             "margin": {"t": 0},
+            "showlegend": False,
         }
         config = {"displayModeBar": False, "responsive": True}
 
@@ -117,7 +214,9 @@ class SelectionStep(Component):
         pts = evt["points"]
         if not pts:
             return
-        idx = pts[0]["pointIndex"]
+        # the population trace can be decimated, so its point index is not the
+        # index of the balloon
+        idx = pts[0]["customdata"]
         self.set_selected(idx)
 
     def design_space_title(self) -> NodeType:
@@ -129,20 +228,34 @@ class SelectionStep(Component):
                 )[mui.Icon["arrow_back"]]
             ],
             mui.Tooltip(title="Regenerate population")[
-                mui.IconButton(onClick=lambda evt: STORE.create_models())[
+                mui.IconButton(onClick=self.regenerate)[
                     mui.Icon["cached_icon"]
                 ]
             ],
         ]
 
     def design_space_datagrid(self) -> NodeType:
-        selected = self.selected
+        # the row of the selected balloon, which the store keeps when it rebuilds
+        # the models
+        selected = STORE.index_of(STORE.selected)
+        rows, row_count = self.datagrid_data()
         return FullParent[
             mui.DataGrid(
                 columns=self.cols,
-                rows=self.datagrid_data(),
+                rows=rows,
+                rowCount=row_count,
+                paginationMode="server",
+                sortingMode="server",
+                filterMode="server",
+                paginationModel=self.pagination_model,
+                onPaginationModelChange=self.set_pagination_model,
+                pageSizeOptions=[25, 50, 100],
+                sortModel=self.sort_model,
+                onSortModelChange=self.set_sort_model,
+                filterModel=self.filter_model,
+                onFilterModelChange=self.set_filter_model,
                 density="compact",
-                rowSelectionModel=[selected],
+                rowSelectionModel=[] if selected is None else [selected],
                 onRowSelectionModelChange=lambda v, evt: v and self.set_selected(v[0]),
             )
         ]
@@ -1,7 +1,13 @@
-from random import random
+import logging
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
 
+import numpy as np
 from model.balloon import HotAirBalloon
-from parapy.core import Base, Input, MutableSequence, Part
+from model.population import INPUTS, Population
+from parapy.core import Attribute, Base, Input, MutableSequence, Part, child
 
 DEFAULT_STEP = 0
 DEFAULT_POPULATION_SIZE = 100
@@ -10,6 +16,12 @@ DEFAULT_RADIUS = [4, 6]
 DEFAULT_SHAPE = [1, 4]
 DEFAULT_COLOR = "red"
 
+# Every session has a store of its own, instead of all sessions sharing one. Saving
+# is disabled then, see persistence.PERSISTENCE_DISABLED.
+SESSION_STORES = bool(os.getenv("PARAPY_APP_SESSION_STORES"))
+
+logger = logging.getLogger(__name__)
+
 
 class Store(Base):
     # Initialization/ configuration
@@ -24,26 +36,100 @@ class Store(Base):
     selected: HotAirBalloon = Input(None)
     final_design: HotAirBalloon = Input(None)
 
+    # Inputs and properties of all models, evaluated at once. The design space is
+    # drawn from this; the ParaPy models are only evaluated for the selected design.
+    # Change it with replace_models, extend_models or clear_models.
+    population: Optional[Population] = Input(None)
+    # True while a saved population is being loaded
+    is_loading: bool = Input(False)
+
+    @Attribute
+    def model_inputs(self) -> list[dict]:
+        population = self.population
+        if population is None:
+            return []
+        return [population.inputs(idx) for idx in range(len(population))]
+
     @Part
     def models(self) -> MutableSequence:
-        return MutableSequence(type=HotAirBalloon, quantify=0)
-
-    def create_models(self) -> None:
-        r1 = self.radius[0]
-        r2 = self.radius[1] - r1
-        h1 = self.height[0]
-        h2 = self.height[1] - h1
-        s1 = self.shape[0]
-        s2 = self.shape[1] - s1
-        for _ in range(self.pop_size):
-            self.models.append(
-                HotAirBalloon(
-                    radius=random() * r2 + r1,
-                    height=random() * h2 + h1,
-                    half_height=random() * s2 + s1,
-                    color=self.color,
-                )
+        # One balloon per row of the population. Replacing the population replaces
+        # all of them as a single change, instead of one per append or pop.
+        rows = self.model_inputs
+        row = rows[child.index] if child.index < len(rows) else {}
+        return MutableSequence(type=HotAirBalloon, quantify=len(rows), **row)
+
+    def replace_models(self, population: Optional[Population]) -> None:
+        """Replaces all models by the balloons of `population`. The selected and
+        final design that were one of the models are re-resolved by their index:
+        they are the new model at that index if it has the same inputs, otherwise
+        a stand-alone balloon with their inputs."""
+        self.sync_models()
+        designs = []
+        for model in (self.selected, self.final_design):
+            idx = self.index_of(model)
+            # the inputs are read before the models are rebuilt
+            inputs = None if idx is None else self.population.inputs(idx)
+            designs.append((model, idx, inputs))
+
+        self.population = population
+
+        resolved = []
+        for model, idx, inputs in designs:
+            if idx is None:
+                resolved.append(model)
+            elif (
+                population is not None
+                and idx < len(population)
+                and population.inputs(idx) == inputs
+            ):
+                resolved.append(self.models[idx])
+            else:
+                resolved.append(HotAirBalloon(**inputs))
+        self.selected, self.final_design = resolved
+        notify_change(self)
+
+    def extend_models(self, population: Population) -> None:
+        """Adds the balloons of `population` after the current models"""
+        if self.population is None:
+            self.replace_models(population)
+        else:
+            # the refined designs are kept in the copy of the current rows
+            self.sync_models()
+            self.replace_models(Population.concat([self.population, population]))
+
+    def clear_models(self) -> None:
+        self.replace_models(None)
+
+    def create_models(self, rng: Optional[np.random.Generator] = None) -> None:
+        self.replace_models(
+            Population.random(
+                self.pop_size,
+                self.height,
+                self.radius,
+                self.shape,
+                color=self.color,
+                rng=rng,
             )
+        )
+
+    def index_of(self, model: Optional[HotAirBalloon]) -> Optional[int]:
+        """Index of `model` in models, None if it is not one of them. Only looks at
+        the model at the index of `model`, so it does not instantiate all models."""
+        idx = getattr(model, "index", None)
+        if idx is None or not 0 <= idx < len(self.model_inputs):
+            return None
+        return idx if self.models[idx] is model else None
+
+    def sync_models(self) -> None:
+        """Writes the inputs of the selected and final design, which the user can
+        refine, back into their rows of the population, so the design space shows
+        them as they are now"""
+        for model in (self.selected, self.final_design):
+            idx = self.index_of(model)
+            if idx is not None:
+                self.population.update_row(
+                    idx, {name: getattr(model, name) for name in INPUTS}
+                )
 
     def reset(self, hard: bool = True) -> None:
         if hard:
@@ -56,7 +142,76 @@ class Store(Base):
         self.step = DEFAULT_STEP
         self.selected = None
         self.final_design = None
-        [self.models.pop() for _ in range(len(self.models))]
+        self.clear_models()
+
+
+class StoreProxy:
+    """Forwards attribute access to the store of the current session, see
+    current_store. The components keep using the one STORE."""
+
+    def __getattr__(self, name: str):
+        return getattr(current_store(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        store = current_store()
+        setattr(store, name, value)
+        notify_change(store)
+
+    def __repr__(self) -> str:
+        return f"<StoreProxy of {current_store()!r}>"
+
+
+# Called with the store after every change made through STORE or replace_models
+_change_hooks: list[Callable[[Store], None]] = []
+
+
+def on_change(hook: Callable[[Store], None]) -> None:
+    """Calls `hook` with the store after every change of a store, on the thread
+    that made the change (the thread of a session for the changes made by the UI)"""
+    _change_hooks.append(hook)
+
+
+def notify_change(store: Store) -> None:
+    for hook in _change_hooks:
+        try:
+            hook(store)
+        except Exception:
+            logger.exception("Store change hook failed")
+
+
+# Store of the sessions without a store of their own, and of background threads
+DEFAULT_STORE = Store()
+_current: ContextVar[Optional[Store]] = ContextVar("store", default=None)
+
+
+def current_store() -> Store:
+    """The store activated in this context, or the default store. With session
+    stores a context without a store is an error, instead of silently sharing the
+    default store: e.g. a thread of an executor does not get the context of the
+    session that submitted its work, unless it is run in a copy of it."""
+    store = _current.get()
+    if store is not None:
+        return store
+    if SESSION_STORES:
+        raise RuntimeError("No session store is active in this context")
+    return DEFAULT_STORE
+
+
+def activate_store(store: Store) -> None:
+    """Makes `store` the current store of this context. The context of a task is
+    copied to the tasks it creates, so an activation in the task that handles a
+    session holds for everything that session does afterwards."""
+    _current.set(store)
+
+
+@contextmanager
+def using_store(store: Store) -> Iterator[Store]:
+    """Makes `store` the current store inside the with block"""
+    token = _current.set(store)
+    try:
+        yield store
+    finally:
+        _current.reset(token)
 
 
-STORE = Store()
+STORE = StoreProxy()
@@ -0,0 +1,49 @@
+import os
+
+from parapy.cloud.datastore.client import TestingClient
+from persistence.chunks import MAX_CHUNK_SIZE, MIN_CHUNK_SIZE, ChunkStore, split_chunks
+
+
+def test_chunks_follow_content():
+    data = os.urandom(500 * 1024)
+    chunks = split_chunks(data)
+
+    assert b"".join(chunks) == data
+    assert all(MIN_CHUNK_SIZE <= len(c) <= MAX_CHUNK_SIZE for c in chunks[:-1])
+
+    # inserting bytes only changes the chunk(s) around the insertion
+    edited = split_chunks(data[:1000] + b"inserted" + data[1000:])
+    assert len(set(edited) - set(chunks)) <= 2
+
+
+def test_upload_is_proportional_to_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingClient, "default_storage_dir", tmp_path / "remote")
+    store = ChunkStore(TestingClient(), tmp_path / "local")
+    data = os.urandom(500 * 1024)
+
+    manifest, uploaded = store.upload("Report.pdf", data)
+    assert uploaded == len(set(manifest["chunks"]))
+    _, uploaded = store.upload("Report.pdf", data[:-100] + os.urandom(100))
+    assert 1 <= uploaded <= 2
+    _, uploaded = store.upload("Report.pdf", data[:-100] + b"0" * 100)
+    assert 1 <= uploaded <= 2
+
+    path, _ = ChunkStore(store.client, tmp_path / "download").download("Report.pdf")
+    assert path.read_bytes() == data[:-100] + b"0" * 100
+
+    store.delete("Report.pdf")
+    assert store.download("Report.pdf") is None
+
+
+def test_shared_upload_keeps_unused_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingClient, "default_storage_dir", tmp_path / "remote")
+    store = ChunkStore(TestingClient(), tmp_path / "local")
+
+    first, _ = store.upload("save.zip", os.urandom(100 * 1024))
+    store.upload("save.zip", os.urandom(100 * 1024), delete_unused=False)
+    # another process may still be reading the file of the first manifest
+    with store.client.session(download_dir=tmp_path / "check") as session:
+        assert all(
+            session.files.exists(store.chunk_filename("save.zip", digest))
+            for digest in first["chunks"]
+        )
@@ -0,0 +1,91 @@
+import threading
+import time
+
+from identity import UNKNOWN, get_display_name, prefetch_display_name
+from identity.cache import IdentityCache
+from parapy.cloud.iam.client import TestingClient
+
+
+class CountingClient(TestingClient):
+    def __init__(self, *args, delay=0.0, fail=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    def get_me(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("IAM is down")
+        return super().get_me()
+
+
+def test_display_name_is_cached():
+    client = CountingClient()
+    name = get_display_name(client, token="a")
+
+    assert name != UNKNOWN
+    assert get_display_name(client, token="a") == name
+    assert client.calls == 1
+    get_display_name(client, token="b")
+    assert client.calls == 2
+
+
+def test_display_name_is_cached_per_client():
+    get_display_name(CountingClient(), token="c")
+    # may be created at the address of the collected client
+    client = CountingClient()
+    get_display_name(client, token="c")
+    assert client.calls == 1
+
+
+def test_concurrent_lookups_are_coalesced():
+    client = CountingClient(delay=0.2)
+    names = []
+    threads = [
+        threading.Thread(target=lambda: names.append(get_display_name(client)))
+        for _ in range(5)
+    ]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+
+    assert client.calls == 1
+    assert len(set(names)) == 1
+
+
+def test_slow_lookup_does_not_block():
+    client = CountingClient(delay=0.5)
+    prefetch_display_name(client, token="slow")
+
+    start = time.monotonic()
+    assert get_display_name(client, token="slow", timeout=0) == UNKNOWN
+    assert time.monotonic() - start < 0.1
+    assert get_display_name(client, token="slow", timeout=5) != UNKNOWN
+
+
+def test_failures_are_retried_after_error_ttl():
+    client = CountingClient(fail=True)
+    cache = IdentityCache(error_ttl=0.1)
+
+    def fetch():
+        return client.get_me().display_name
+
+    assert cache.get("key", fetch) is None
+    assert cache.get("key", fetch) is None
+    assert client.calls == 1
+    time.sleep(0.15)
+    client.fail = False
+    assert cache.get("key", fetch) is not None
+    assert client.calls == 2
+
+
+def test_expired_lookups_are_dropped():
+    cache = IdentityCache(ttl=0.1)
+    for key in range(10):
+        cache.get(key, lambda: "name")
+    assert len(cache) == 10
+
+    time.sleep(0.15)
+    cache.get("key", lambda: "name")
+    assert len(cache) == 1
@@ -1,9 +1,30 @@
 import pytest
 from model.balloon import HotAirBalloon
 
+
 def test_balloon_volume():
     balloon = HotAirBalloon()
+    occ_balloon = HotAirBalloon(use_occ=True)
+
+    # the quadrature is exact for the volume, OCC integrates the solid to about 1e-5
+    assert occ_balloon.volume == pytest.approx(381.8226640972622)
+    assert balloon.volume == pytest.approx(occ_balloon.volume, rel=2e-5)
+    balloon.height = occ_balloon.height = 12
+    assert occ_balloon.volume == pytest.approx(470.7370494173471)
+    assert balloon.volume == pytest.approx(occ_balloon.volume, rel=2e-5)
+
+
+def test_balloon_volume_quadrature():
+    balloon = HotAirBalloon()
 
-    assert balloon.volume == pytest.approx(381.8226640972622)
+    assert balloon.volume == pytest.approx(381.8185706006454)
     balloon.height = 12
-    assert balloon.volume == pytest.approx(470.7370494173471)
\ No newline at end of file
+    assert balloon.volume == pytest.approx(470.7312526546494)
+
+
+def test_balloon_area():
+    balloon = HotAirBalloon()
+    occ_balloon = HotAirBalloon(use_occ=True)
+
+    assert balloon.area == pytest.approx(occ_balloon.area, rel=1e-4)
+    assert balloon.cost == pytest.approx(occ_balloon.cost, rel=1e-4)
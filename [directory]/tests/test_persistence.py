@@ -0,0 +1,99 @@
+import zipfile
+
+from parapy.cloud.datastore.client import TestingClient
+from persistence import load_header, save
+from persistence.columnar import MODEL_VERSION, ColumnarStoreModel
+from persistence.model import StoreModel
+from ui.store import STORE, Store, using_store
+
+
+def test_columnar_round_trip(tmp_path):
+    location = tmp_path / "save.zip"
+    STORE.reset()
+    STORE.create_models()
+    STORE.selected = STORE.final_design = STORE.models[3]
+    STORE.final_design.radius = 7.5  # refined after selection
+    STORE.step = 2
+
+    ColumnarStoreModel.serialize(location, store=STORE)
+    assert ColumnarStoreModel.read_header(location)["version"] == MODEL_VERSION
+    store = ColumnarStoreModel.deserialize(location, store=Store())
+
+    assert store.step == 2
+    assert len(store.models) == len(STORE.models)
+    assert [m.height for m in store.models] == [m.height for m in STORE.models]
+    assert store.final_design is store.models[3]
+    assert store.final_design.radius == 7.5
+    STORE.reset()
+
+
+def test_staged_load(tmp_path):
+    location = tmp_path / "save.zip"
+    STORE.reset()
+    STORE.create_models()
+    STORE.final_design = STORE.models[5]
+    STORE.final_design.height = 11.5
+    ColumnarStoreModel.serialize(location, store=STORE)
+
+    store = Store()
+    header = ColumnarStoreModel.deserialize_header(location, store=store)
+    assert store.population is None
+    assert store.final_design.height == 11.5
+
+    ColumnarStoreModel.deserialize_population(location, header, store=store)
+    assert store.final_design is store.models[5]
+    assert store.final_design.height == 11.5
+    assert store.index_of(store.final_design) == 5
+    STORE.reset()
+
+
+def test_legacy_json_migration(tmp_path):
+    location = tmp_path / "save.json"
+    STORE.reset()
+    STORE.create_models()
+    STORE.selected = STORE.final_design = STORE.models[0]
+    StoreModel.serialize(location, store=STORE)
+
+    assert not zipfile.is_zipfile(location)
+    store = ColumnarStoreModel.deserialize(location, store=Store())
+
+    assert len(store.models) == len(STORE.models)
+    assert store.population is not None
+    assert store.selected is store.final_design is store.models[0]
+    STORE.reset()
+
+
+def test_edits_during_staged_load_are_kept(tmp_path):
+    location = tmp_path / "save.zip"
+    STORE.reset()
+    STORE.create_models()
+    STORE.final_design = STORE.models[5]
+    ColumnarStoreModel.serialize(location, store=STORE)
+
+    store = Store()
+    header = ColumnarStoreModel.deserialize_header(location, store=store)
+    store.final_design.height = 13.5  # refined before the population is loaded
+
+    ColumnarStoreModel.deserialize_population(location, header, store=store)
+    assert store.final_design is store.models[5]
+    assert store.final_design.height == 13.5
+    STORE.reset()
+
+
+def test_population_is_read_in_the_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingClient, "default_storage_dir", tmp_path / "remote")
+    client = TestingClient()
+    STORE.reset()
+    STORE.create_models()
+    STORE.final_design = STORE.models[5]
+    save(client, tmp_path / "saved")
+
+    store = Store()
+    with using_store(store):
+        load_population = load_header(client, tmp_path / "loaded")
+    assert store.is_loading
+    assert store.population is None
+    assert load_population(10)
+    assert not store.is_loading
+    assert store.final_design is store.models[5]
+    STORE.reset()
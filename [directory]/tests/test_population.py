@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from model.population import INPUTS, Population
+
+
+def test_population_volume():
+    # Same balloons as test_balloon_volume, which integrates the OCC solid
+    population = Population(height=[10, 12])
+
+    assert population.volume == pytest.approx(
+        [381.8226640972622, 470.7370494173471], rel=1e-4
+    )
+    assert population.weight == pytest.approx(population.volume * 0.25)
+
+
+def test_population_random():
+    population = Population.random(
+        50, height=[8, 12], radius=[4, 6], shape=[1, 4], rng=np.random.default_rng(0)
+    )
+
+    assert len(population) == 50
+    assert np.all((population["height"] >= 8) & (population["height"] <= 12))
+    assert np.all((population["radius"] >= 4) & (population["radius"] <= 6))
+    assert np.all(population["opening_radius"] == INPUTS["opening_radius"])
+    assert np.all(population.cost > 0)
+
+
+def test_population_inputs():
+    population = Population(color="blue", radius=[4.5, 5.5])
+
+    assert population.inputs(1) == dict(INPUTS, radius=5.5, color="blue")
+    with pytest.raises(ValueError):
+        Population(diameter=[10])
+
+
+def test_population_query():
+    population = Population(radius=[5, 4, 6, 4.5])
+
+    assert population.query(sort="radius").tolist() == [1, 3, 0, 2]
+    assert population.query(sort="radius", descending=True).tolist() == [2, 0, 3, 1]
+    assert population.query(
+        sort="radius", filters=[("radius", ">", "4.2"), ("index", "!=", 2)]
+    ).tolist() == [3, 0]
+    assert population.query(
+        filters=[("radius", "<", 4.2), ("radius", ">", 5.5)], match_any=True
+    ).tolist() == [1, 2]
+    # incomplete filters are ignored
+    assert len(population.query(filters=[("radius", ">", "")])) == 4
+    assert len(population.query(filters=[("radius", ">", "4e")])) == 4
+    assert len(population.query(filters=[("radius", "isAnyOf", ["4", "-"])])) == 4
+    assert population.query(filters=[("radius", "isAnyOf", ["4", "6"])]).tolist() == [
+        1,
+        2,
+    ]
+
+
+def test_population_update_row():
+    population = Population(radius=[4, 5])
+    volume = population.volume.copy()
+
+    assert population.update_row(1, dict(INPUTS, radius=6))
+    assert population["radius"].tolist() == [4, 6]
+    assert population.volume[0] == volume[0]
+    assert population.volume[1] > volume[1]
+    assert not population.update_row(1, dict(INPUTS, radius=6))
@@ -1,12 +1,74 @@
+from model.population import Population
 from ui.store import STORE, DEFAULT_POPULATION_SIZE, DEFAULT_STEP
+import ui.store
+from ui.store import DEFAULT_STORE, Store, current_store, using_store
 
 def test_model_creation():
     STORE.create_models()
     assert len(STORE.models) == DEFAULT_POPULATION_SIZE
+    assert len(STORE.population) == DEFAULT_POPULATION_SIZE
 
 def test_store_reset():
     STORE.reset()
     assert STORE.step == DEFAULT_STEP
     assert STORE.selected is None
     assert STORE.final_design is None
-    assert len(STORE.models) == 0
\ No newline at end of file
+    assert STORE.population is None
+    assert len(STORE.models) == 0
+
+def test_bulk_model_updates():
+    STORE.create_models()
+    STORE.extend_models(Population(radius=[4, 5]))
+    assert len(STORE.models) == DEFAULT_POPULATION_SIZE + 2
+    assert STORE.models[-1].radius == 5
+
+    STORE.replace_models(Population(radius=[6]))
+    assert [model.radius for model in STORE.models] == [6]
+
+    STORE.clear_models()
+    assert len(STORE.models) == 0
+
+def test_session_stores():
+    session_store = Store()
+    with using_store(session_store):
+        assert current_store() is session_store
+        STORE.step = 2
+        STORE.create_models()
+    assert session_store.step == 2
+    assert len(session_store.models) == DEFAULT_POPULATION_SIZE
+    assert current_store() is DEFAULT_STORE
+    STORE.reset()
+    assert len(session_store.models) == DEFAULT_POPULATION_SIZE
+
+def test_refinement_written_back():
+    STORE.replace_models(Population(radius=[4, 5]))
+    STORE.final_design = STORE.models[1]
+    STORE.final_design.radius = 6
+    STORE.sync_models()
+    assert STORE.population["radius"].tolist() == [4, 6]
+    STORE.reset()
+
+def test_selection_survives_rebuild():
+    STORE.replace_models(Population(radius=[4, 5]))
+    STORE.selected = STORE.final_design = STORE.models[1]
+    STORE.final_design.height = 11
+    STORE.extend_models(Population(radius=[6]))
+    assert STORE.selected is STORE.final_design is STORE.models[1]
+    assert STORE.final_design.height == 11
+    assert STORE.index_of(STORE.selected) == 1
+
+    STORE.replace_models(Population(radius=[6]))
+    assert STORE.index_of(STORE.selected) is None
+    assert STORE.selected.radius == 5
+    STORE.reset()
+
+def test_change_hooks(monkeypatch):
+    monkeypatch.setattr(ui.store, "_change_hooks", [])
+    changed = []
+    ui.store.on_change(changed.append)
+
+    store = Store()
+    with using_store(store):
+        STORE.step = 2
+        STORE.create_models()
+    assert len(changed) == 2 and all(c is store for c in changed)
@@ -0,0 +1,109 @@
+import os
+import time
+
+from parapy.cloud.datastore.client import TestingClient
+from persistence.chunks import ChunkStore
+from persistence.worker import SaveWorker
+
+
+def make_worker(tmp_path, monkeypatch, data):
+    monkeypatch.setattr(TestingClient, "default_storage_dir", tmp_path / "remote")
+    chunks = ChunkStore(TestingClient(), tmp_path / "local")
+    return SaveWorker(lambda: data[0], chunks, "save.zip")
+
+
+def test_only_changed_chunks_are_uploaded(tmp_path, monkeypatch):
+    data = [os.urandom(200 * 1024)]
+    worker = make_worker(tmp_path, monkeypatch, data)
+
+    worker.request()
+    assert worker.wait(timeout=10)
+    assert worker.status == "saved"
+    first = worker.uploaded_chunks
+    assert first > 5
+
+    data[0] = data[0][:-10] + b"0123456789"
+    worker.request()
+    assert worker.wait(timeout=10)
+    assert 1 <= worker.uploaded_chunks <= 2
+
+    worker.request()
+    assert worker.wait(timeout=10)
+    assert worker.uploaded_chunks == 0
+
+
+def test_saved_file_is_restored(tmp_path, monkeypatch):
+    data = [os.urandom(50 * 1024)]
+    worker = make_worker(tmp_path, monkeypatch, data)
+    worker.request()
+    worker.wait(timeout=10)
+
+    chunks = ChunkStore(worker.chunks.client, tmp_path / "download")
+    path, manifest = chunks.download("save.zip")
+
+    assert manifest == worker.committed
+    assert path.read_bytes() == data[0]
+
+
+def test_progress_is_reported(tmp_path, monkeypatch):
+    worker = make_worker(tmp_path, monkeypatch, [os.urandom(50 * 1024)])
+    statuses = []
+
+    def listener(worker):
+        statuses.append(worker.status)
+
+    worker.subscribe(listener)
+    worker.request()
+    worker.wait(timeout=10)
+
+    assert statuses[0] == "pending"
+    assert "saving" in statuses
+    assert statuses[-1] == "saved"
+
+
+def test_request_listener_only_sees_its_save(tmp_path, monkeypatch):
+    data = [os.urandom(50 * 1024)]
+    worker = make_worker(tmp_path, monkeypatch, data)
+    first, second = [], []
+
+    worker.request(lambda w: first.append(w.status))
+    worker.wait(timeout=10)
+    worker.request(lambda w: second.append(w.status))
+    worker.wait(timeout=10)
+
+    assert first[0] == "pending" and first[-1] == "saved"
+    assert second[0] == "pending" and second[-1] == "saved"
+    assert first.count("saved") == second.count("saved") == 1
+
+
+def test_autosave(tmp_path, monkeypatch):
+    worker = make_worker(tmp_path, monkeypatch, [os.urandom(1024)])
+    assert not worker.autosave()
+
+    worker.autosave_interval = 0.0
+    assert worker.autosave()
+    assert worker.wait(timeout=10)
+    assert worker.status == "saved"
+
+
+def test_autosave_is_deferred(tmp_path, monkeypatch):
+    data = [os.urandom(1024)]
+    worker = make_worker(tmp_path, monkeypatch, data)
+    worker.autosave_interval = 0.5
+    worker.request()
+    assert worker.wait(timeout=10)
+    committed = worker.committed
+
+    # the snapshots of changes within the interval replace each other
+    for _ in range(3):
+        data[0] = os.urandom(1024)
+        assert worker.autosave()
+    time.sleep(0.2)
+    assert worker.committed is committed
+    time.sleep(0.5)
+    assert worker.wait(timeout=10)
+    assert worker.committed is not committed
+
+    chunks = ChunkStore(worker.chunks.client, tmp_path / "download")
+    path, _ = chunks.download("save.zip")
+    assert path.read_bytes() == data[0]
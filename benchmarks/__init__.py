@@ -0,0 +1,22 @@
+"""
+Benchmarks of the geometry, AVL and web app hot paths.
+
+Run all of them, or the groups given, and write the results as JSON::
+
+    python -m benchmarks --output results.json
+    python -m benchmarks geometry avl --repeat 10
+
+Every benchmark uses fixed seeds and the reference designs of benchmarks.designs, so
+runs on the same machine can be compared. Benchmarks whose dependencies (ParaPy,
+kbeutils, fpdf, ...) are not installed are reported as skipped.
+"""
+
+import pathlib
+import sys
+
+ROOT = pathlib.Path(__file__).parent.parent
+# fede is imported as a package, but also imports its modules by their plain name; the
+# web app has its modules in src (see main.py)
+for path in (ROOT, ROOT / "fede", ROOT / "[directory]" / "src"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
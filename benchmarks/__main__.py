@@ -0,0 +1,67 @@
+import argparse
+import pathlib
+import sys
+
+# importing the modules registers their benchmarks
+from benchmarks import bench_avl, bench_geometry, bench_report, bench_webapp  # noqa
+from benchmarks.harness import (
+    BENCHMARKS,
+    DEFAULT_REPEAT,
+    DEFAULT_WARMUP,
+    run,
+    write,
+)
+
+GROUPS = sorted({bench.group for bench in BENCHMARKS})
+
+
+def print_result(result: dict) -> None:
+    if result["status"] == "ok":
+        print(
+            f"{result['id']:<60} {result['median'] * 1000:>10.2f} ms"
+            f" (min {result['min'] * 1000:.2f}, stdev {result['stdev'] * 1000:.2f})"
+        )
+    else:
+        reason = result["reason"].strip().splitlines()[-1]
+        print(f"{result['id']:<60} {result['status']}: {reason}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("groups", nargs="*", help=f"any of {', '.join(GROUPS)}")
+    parser.add_argument("-k", "--filter", help="only benchmarks whose id has this")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("-o", "--output", type=pathlib.Path, help="JSON results file")
+    parser.add_argument("--no-memory", action="store_true", help="skip memory peaks")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks")
+    args = parser.parse_args(argv)
+    unknown = set(args.groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+
+    benchmarks = [
+        bench
+        for bench in BENCHMARKS
+        if (not args.groups or bench.group in args.groups)
+        and (args.filter is None or args.filter in bench.id)
+    ]
+    if args.list:
+        for bench in benchmarks:
+            print(f"{bench.group:<10} {bench.id}")
+        return 0
+
+    document = run(
+        benchmarks,
+        args.repeat,
+        args.warmup,
+        progress=print_result,
+        memory=not args.no_memory,
+    )
+    if args.output is not None:
+        write(document, args.output)
+    return int(any(result["status"] == "error" for result in document["results"]))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""AVL analyses of the aircraft, with the stub of benchmarks.stub_avl where AVL does
+not run"""
+
+import os
+
+from benchmarks.bench_geometry import build
+from benchmarks.designs import AIRCRAFT, AVL_CASES, MACH_LIST
+from benchmarks.harness import benchmark
+from benchmarks.stub_avl import avl_available, stubbed_avl
+
+# "1" always uses the stub, "0" never does; by default only where AVL is not available
+STUB_AVL = os.getenv("BENCHMARK_STUB_AVL")
+
+
+def case_settings(alpha: float = 3) -> list:
+    from kbeutils import avl
+
+    cases = []
+    for name, settings in AVL_CASES:
+        settings = {
+            key: (
+                avl.Parameter(name=value[0], value=value[1], setting=value[2])
+                if isinstance(value, tuple)
+                else value
+            )
+            for key, value in settings.items()
+        }
+        if "alpha" in settings and not isinstance(settings["alpha"], avl.Parameter):
+            settings["alpha"] = alpha
+        cases.append((name, settings))
+    return cases
+
+
+def use_stub() -> bool:
+    if STUB_AVL is not None:
+        return STUB_AVL == "1"
+    return not avl_available()
+
+
+def analyse(model) -> list:
+    return [analysis.l_over_d for analysis in model.avl_analyses]
+
+
+def analysis(**inputs):
+    from fede.convAVL import ConvAnalysis
+
+    return ConvAnalysis(
+        **AIRCRAFT, mach_list=MACH_LIST, case_settings=case_settings(), **inputs
+    )
+
+
+@benchmark("avl.analysis", "avl")
+def avl_analysis():
+    """Only the analyses: the geometry is built once and the angle of attack changed
+    for every run"""
+    model = analysis()
+    build(model)
+    model.avl_surfaces
+    settings = [case_settings(alpha=4), case_settings(alpha=3)]
+    stub = use_stub()
+
+    def run() -> None:
+        model.case_settings = settings[0]
+        settings.reverse()
+        with stubbed_avl(stub):
+            analyse(model)
+
+    run.info = dict(stub_avl=stub)
+    return run
+
+
+@benchmark("avl.build_and_analysis", "avl")
+def avl_build_and_analysis():
+    """A new model, from the inputs to the results"""
+    stub = use_stub()
+
+    def run() -> None:
+        with stubbed_avl(stub):
+            analyse(analysis())
+
+    run.info = dict(stub_avl=stub)
+    return run
@@ -0,0 +1,91 @@
+"""Airfoil parsing and fitting, batched CST fits, NACA sections, and the build and rebuild of the aircraft"""
+
+from benchmarks.designs import AIRCRAFT, AIRCRAFT_CHANGES, AIRFOILS, CST_BATCHES, NACA
+from benchmarks.harness import benchmark
+
+
+def build(model) -> None:
+    """Evaluates the geometry of `model` and all its parts"""
+    for obj in [model, *model.find_children(lambda obj: True)]:
+        if hasattr(obj, "faces"):
+            obj.faces
+
+
+def toggle(model, name: str, value):
+    """Function that changes input `name` of `model` to `value` and back, on every
+    other call"""
+    values = [value, getattr(model, name)]
+
+    def change() -> None:
+        setattr(model, name, values[0])
+        values.reverse()
+
+    return change
+
+
+@benchmark("airfoil.parse", "geometry", AIRFOILS)
+def airfoil_parse(**inputs):
+    from fede.airfoil import Airfoil, read_airfoil_file
+
+    def parse() -> None:
+        # the file is read once per process otherwise, and every later run would
+        # only measure a cache hit
+        read_airfoil_file.cache_clear()
+        Airfoil(**inputs).coords_list
+
+    return parse
+
+
+@benchmark("airfoil.fit", "geometry", AIRFOILS)
+def airfoil_fit(**inputs):
+    from fede.airfoil import Airfoil
+
+    def fit() -> None:
+        airfoil = Airfoil(**inputs)
+        airfoil.points
+        airfoil.length
+
+    return fit
+
+
+@benchmark("aircraft.build", "geometry")
+def aircraft_build():
+    from fede.convAera import Aircraft
+
+    return lambda: build(Aircraft(**AIRCRAFT))
+
+
+@benchmark(
+    "aircraft.rebuild",
+    "geometry",
+    [dict(input=name, value=value) for name, value in AIRCRAFT_CHANGES.items()],
+)
+def aircraft_rebuild(input: str, value):
+    from fede.convAera import Aircraft
+
+    aircraft = Aircraft(**AIRCRAFT)
+    build(aircraft)
+    change = toggle(aircraft, input, value)
+
+    def rebuild() -> None:
+        change()
+        build(aircraft)
+
+    return rebuild
+
+
+@benchmark("section.curve", "geometry", [dict(airfoil_name=name) for name in NACA])
+def section_curve(airfoil_name: str):
+    from fede.section import Section
+
+    # after the first call the airfoil points come from the cache, as in a model build
+    return lambda: Section(airfoil_name=airfoil_name, chord=2.5).curve.length
+
+
+@benchmark("cst.fit", "geometry", [dict(airfoils=size) for size in CST_BATCHES])
+def cst_fit(airfoils: int):
+    from fede.cst import fit_files
+
+    names = [inputs["airfoil_name"] for inputs in AIRFOILS]
+    names = (names * airfoils)[:airfoils]
+    return lambda: fit_files(names, cache=False)
@@ -0,0 +1,23 @@
+"""PDF report of an analysis"""
+
+import tempfile
+
+from benchmarks.designs import REPORT_DATA
+from benchmarks.harness import benchmark
+
+# reports, removed when the process ends
+DIRECTORY = tempfile.TemporaryDirectory(prefix="benchmark-")
+
+
+@benchmark("report.create_pdf_report", "report")
+def create_pdf_report():
+    from fede.reporter import ReportConfig, create_pdf_report
+
+    config = ReportConfig(
+        filename="Report.pdf",
+        title="ConvAera benchmark",
+        data_object=REPORT_DATA,
+        output_dir=DIRECTORY.name,
+    )
+
+    return lambda: create_pdf_report(config)
@@ -0,0 +1,99 @@
+"""Population creation, balloon evaluation and saving and loading of the web app
+store"""
+
+import pathlib
+import tempfile
+
+import numpy as np
+
+from benchmarks.designs import POPULATION_SIZES
+from benchmarks.harness import SEED, benchmark
+
+# The JSON format instantiates every balloon, larger populations take minutes
+STORE_MODEL_SIZES = POPULATION_SIZES[:2]
+# save files, removed when the process ends
+DIRECTORY = tempfile.TemporaryDirectory(prefix="benchmark-")
+
+
+def filled_store(pop_size: int):
+    from ui.store import Store
+
+    store = Store(pop_size=pop_size)
+    store.create_models(rng=np.random.default_rng(SEED))
+    store.selected = store.final_design = store.models[0]
+    return store
+
+
+def save_file(name: str, pop_size: int) -> pathlib.Path:
+    return pathlib.Path(DIRECTORY.name) / f"{pop_size}-{name}"
+
+
+@benchmark(
+    "store.create_models",
+    "webapp",
+    [dict(pop_size=size) for size in POPULATION_SIZES],
+)
+def store_create_models(pop_size: int):
+    from ui.store import Store
+
+    store = Store(pop_size=pop_size)
+    return lambda: store.create_models(rng=np.random.default_rng(SEED))
+
+
+@benchmark("balloon.volume", "webapp", [dict(use_occ=False), dict(use_occ=True)])
+def balloon_volume(use_occ: bool):
+    from model.balloon import HotAirBalloon
+
+    return lambda: HotAirBalloon(use_occ=use_occ).volume
+
+
+@benchmark(
+    "store_model.serialize",
+    "webapp",
+    [dict(pop_size=size) for size in STORE_MODEL_SIZES],
+)
+def store_model_serialize(pop_size: int):
+    from persistence.model import StoreModel
+
+    store = filled_store(pop_size)
+    path = save_file("save.json", pop_size)
+    return lambda: StoreModel.serialize(path, store=store)
+
+
+@benchmark(
+    "store_model.deserialize",
+    "webapp",
+    [dict(pop_size=size) for size in STORE_MODEL_SIZES],
+)
+def store_model_deserialize(pop_size: int):
+    from persistence.model import StoreModel
+
+    path = save_file("save.json", pop_size)
+    StoreModel.serialize(path, store=filled_store(pop_size))
+    return lambda: StoreModel.deserialize(path)
+
+
+@benchmark(
+    "columnar.serialize",
+    "webapp",
+    [dict(pop_size=size) for size in POPULATION_SIZES],
+)
+def columnar_serialize(pop_size: int):
+    from persistence.columnar import ColumnarStoreModel
+
+    store = filled_store(pop_size)
+    path = save_file("save.zip", pop_size)
+    return lambda: ColumnarStoreModel.serialize(path, store=store)
+
+
+@benchmark(
+    "columnar.deserialize",
+    "webapp",
+    [dict(pop_size=size) for size in POPULATION_SIZES],
+)
+def columnar_deserialize(pop_size: int):
+    from persistence.columnar import ColumnarStoreModel
+
+    path = save_file("save.zip", pop_size)
+    ColumnarStoreModel.serialize(path, store=filled_store(pop_size))
+    return lambda: ColumnarStoreModel.deserialize(path)
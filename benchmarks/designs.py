@@ -0,0 +1,75 @@
+"""
+Reference designs of the benchmarks.
+
+The aircraft is the ConvAera drone of the GUI (fede/Combined_GUI.py) with the analysis
+cases of fede/convAVL.py. Changes of a single input are used to time a rebuild.
+"""
+
+AIRCRAFT = dict(
+    label="aircraft",
+    fu_side=3.5,
+    fu_height=5,
+    fu_distance=50,
+    airfoil_root_name="b29root",
+    airfoil_tip_name="b29tip",
+    w_c_root=9.0,
+    w_c_tip=2.3,
+    t_factor_root=1,
+    t_factor_tip=1,
+    w_semi_span=35.0,
+    sweep=25,
+    twist=-5,
+    wing_dihedral=0,
+    wing_position_fraction_long=0.4,
+    wing_position_fraction_vrt=0.6,
+    vt_long=0.8,
+    vt_taper=0.4,
+    booms_radius=0.5,
+    booms_length=60,
+    booms_sections=[100, 100, 100, 100, 100],
+    mesh_deflection=0.01,
+)
+
+# input -> value that it is changed to (and back) for a rebuild
+AIRCRAFT_CHANGES = {
+    "w_semi_span": 36.0,
+    "sweep": 20,
+    "wing_dihedral": 3,
+    "fu_height": 5.5,
+    "booms_radius": 0.6,
+    "propeller_radius": 7.5,
+}
+
+MACH_LIST = [0.5, 0.3, 0.2]
+
+# settings of avl.Case; avl.Parameter values are given as (name, value, setting), so
+# this module does not need kbeutils
+AVL_CASES = [
+    ("fixed_aoa", {"alpha": 3}),
+    ("fixed_cl", {"alpha": ("alpha", 0.3, "CL")}),
+    ("trimmed", {"alpha": 3, "elevator": ("elevator", 0.0, "Cm")}),
+]
+
+AIRFOILS = [
+    dict(airfoil_name="NACA2411", chord=350.0),
+    dict(airfoil_name="b29root", chord=9.0),
+    dict(airfoil_name="b29tip", chord=2.3, thickness_factor=1.2),
+]
+
+# numbers of airfoils fitted at once
+CST_BATCHES = [3, 300]
+
+# designations of the AVL sections: the fuselage, booms and landing gear, and the wings
+NACA = ["0000", "2412"]
+
+POPULATION_SIZES = [100, 1000, 10000]
+
+REPORT_DATA = {
+    "AoA": 3,
+    "L_D_fixed": 18.42,
+    "Total_Lift_fixed": 0.61,
+    "L/D (trimmed)": 17.95,
+    "Wing area": 545.3,
+    "Span": 70.0,
+    "Mass": 1520.0,
+}
@@ -0,0 +1,276 @@
+"""
+Regression gate: compares a benchmark run with the baseline of the machine profile.
+
+Baselines are results documents (see benchmarks.harness) stored per machine profile in
+benchmarks/baselines. A benchmark has regressed if its median time grew by more than
+`threshold` (a fraction) and Welch's t-test on the samples says the run is slower with
+significance `alpha`. A regression of one of the GATED hot paths fails the gate, as does
+a gated benchmark of the baseline that is missing from the run or did not run ok; the
+others are only reported, as are the changes of the memory peaks. ::
+
+    python -m benchmarks.gate --save-baseline   # on a known good commit
+    python -m benchmarks.gate                   # exit status 1 on a regression
+    python -m benchmarks.gate --results run.json --report diff.md
+"""
+
+import argparse
+import json
+import math
+import os
+import pathlib
+import re
+import sys
+from typing import Optional, Sequence
+
+from benchmarks import bench_avl, bench_geometry, bench_webapp  # noqa
+from benchmarks.harness import BENCHMARKS, DEFAULT_WARMUP, machine, run, write
+
+BASELINE_DIR = pathlib.Path(__file__).parent / "baselines"
+GROUPS = ("geometry", "avl", "webapp")
+# Names of the benchmarks whose regression fails the gate
+GATED = ("aircraft.rebuild", "balloon.volume", "store_model.serialize")
+THRESHOLD = 0.10
+ALPHA = 0.05
+# Verdicts of a diff that pass the gate
+OK = ("same", "improved")
+REPEAT = 10  # the t-test needs a few samples of both runs
+
+
+def profile(info: Optional[dict] = None) -> str:
+    """Name of the machine profile, BENCHMARK_PROFILE if set. Runs are only compared
+    with a baseline of the same profile."""
+    name = os.getenv("BENCHMARK_PROFILE")
+    if name:
+        return name
+    info = machine() if info is None else info
+    python = ".".join(info["python"].split(".")[:2])
+    name = f"{info['system']}-{info['machine']}-{info['cpu_count']}cpu-py{python}"
+    return re.sub(r"[^A-Za-z0-9.-]+", "_", name).lower()
+
+
+def baseline_path(name: str) -> pathlib.Path:
+    return BASELINE_DIR / f"{name}.json"
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    # continued fraction of the incomplete beta function (modified Lentz's method)
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        for numerator in (
+            m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+            -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1)),
+        ):
+            d = 1 + numerator * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1) < 1e-12:
+            break
+    return h
+
+
+def betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta function I_x(a, b)"""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(
+        math.lgamma(a + b)
+        - math.lgamma(a)
+        - math.lgamma(b)
+        + a * math.log(x)
+        + b * math.log1p(-x)
+    )
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1 - front * _betacf(b, a, 1 - x) / b
+
+
+def welch(baseline: Sequence[float], current: Sequence[float]) -> tuple[float, float]:
+    """t statistic of Welch's t-test and the one-sided p-value of `current` having a
+    larger mean than `baseline`"""
+    n1, n2 = len(baseline), len(current)
+    m1, m2 = sum(baseline) / n1, sum(current) / n2
+    v1 = sum((x - m1) ** 2 for x in baseline) / (n1 - 1)
+    v2 = sum((x - m2) ** 2 for x in current) / (n2 - 1)
+    se2 = v1 / n1 + v2 / n2
+    if se2 == 0:
+        return (math.inf, 0.0) if m2 > m1 else (0.0, 1.0)
+    t = (m2 - m1) / math.sqrt(se2)
+    df = se2**2 / ((v1 / n1) ** 2 / (n1 - 1) + (v2 / n2) ** 2 / (n2 - 1))
+    tail = betainc(df / 2, 0.5, df / (df + t**2)) / 2  # P(T > |t|)
+    return t, tail if t > 0 else 1 - tail
+
+
+def gated(result: dict) -> bool:
+    return result["name"] in GATED
+
+
+def compare(
+    baseline: dict,
+    current: dict,
+    threshold: float = THRESHOLD,
+    alpha: float = ALPHA,
+) -> list[dict]:
+    """One diff per benchmark that ran in both documents, and one per gated benchmark
+    of the baseline that is missing from `current` or did not run ok there"""
+    old_results = {
+        result["id"]: result
+        for result in baseline["results"]
+        if result["status"] == "ok"
+    }
+    new_results = {result["id"]: result for result in current["results"]}
+    diffs = []
+    for old in old_results.values():
+        new = new_results.get(old["id"])
+        if gated(old) and (new is None or new["status"] != "ok"):
+            diffs.append(
+                dict(
+                    id=old["id"],
+                    gated=True,
+                    baseline=old["median"],
+                    current=None,
+                    change=None,
+                    p_value=None,
+                    memory_baseline=old.get("memory_peak"),
+                    memory_current=None,
+                    memory_change=None,
+                    verdict="missing" if new is None else new["status"],
+                )
+            )
+    for new in current["results"]:
+        old = old_results.get(new["id"])
+        if new["status"] != "ok" or old is None:
+            continue
+        change = new["median"] / old["median"] - 1
+        if len(old["samples"]) > 1 and len(new["samples"]) > 1:
+            _, p_value = welch(old["samples"], new["samples"])
+        else:
+            p_value = None
+        regressed = change > threshold and p_value is not None and p_value < alpha
+        improved = change < -threshold
+        old_peak, new_peak = old.get("memory_peak"), new.get("memory_peak")
+        diffs.append(
+            dict(
+                id=new["id"],
+                gated=gated(new),
+                baseline=old["median"],
+                current=new["median"],
+                change=change,
+                p_value=p_value,
+                memory_baseline=old_peak,
+                memory_current=new_peak,
+                memory_change=(
+                    None
+                    if old_peak is None or new_peak is None
+                    else new_peak - old_peak
+                ),
+                verdict=(
+                    "regressed" if regressed else "improved" if improved else "same"
+                ),
+            )
+        )
+    return diffs
+
+
+def failed(diffs: Sequence[dict]) -> list[dict]:
+    """The diffs of gated benchmarks that regressed, are missing or did not run ok"""
+    return [diff for diff in diffs if diff["gated"] and diff["verdict"] not in OK]
+
+
+def _mib(value: Optional[int], sign: bool = False) -> str:
+    if value is None:
+        return "-"
+    return f"{value / 2**20:{'+' if sign else ''}.2f}"
+
+
+def report(diffs: Sequence[dict], name: str) -> str:
+    """Markdown table of `diffs`, the gated hot paths first"""
+    lines = [
+        f"Benchmarks compared with the baseline of {name}",
+        "",
+        "| benchmark | gated | baseline [ms] | current [ms] | change | p | "
+        "peak [MiB] | peak change [MiB] | verdict |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for diff in sorted(diffs, key=lambda diff: (not diff["gated"], diff["id"])):
+        p_value = "-" if diff["p_value"] is None else f"{diff['p_value']:.3f}"
+        current = "-" if diff["current"] is None else f"{diff['current'] * 1000:.2f}"
+        change = "-" if diff["change"] is None else f"{diff['change']:+.1%}"
+        lines.append(
+            f"| {diff['id']} | {'yes' if diff['gated'] else ''}"
+            f" | {diff['baseline'] * 1000:.2f} | {current}"
+            f" | {change} | {p_value}"
+            f" | {_mib(diff['memory_current'])} | {_mib(diff['memory_change'], True)}"
+            f" | {diff['verdict']} |"
+        )
+    failures = failed(diffs)
+    lines.append("")
+    if failures:
+        ids = ", ".join(diff["id"] for diff in failures)
+        lines.append(f"FAILED: {len(failures)} hot paths regressed or failed: {ids}")
+    else:
+        lines.append("PASSED: no hot path regressed")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.gate")
+    parser.add_argument("groups", nargs="*", help=f"any of {', '.join(GROUPS)}")
+    parser.add_argument("--results", type=pathlib.Path, help="compare this run")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--profile", help="machine profile, see profile()")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--alpha", type=float, default=ALPHA)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("-o", "--output", type=pathlib.Path, help="JSON results file")
+    parser.add_argument("--report", type=pathlib.Path, help="Markdown diff report")
+    args = parser.parse_args(argv)
+    unknown = set(args.groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+
+    if args.results is not None:
+        current = json.loads(args.results.read_text())
+    else:
+        groups = args.groups or GROUPS
+        current = run(
+            [bench for bench in BENCHMARKS if bench.group in groups],
+            args.repeat,
+            args.warmup,
+        )
+    if args.output is not None:
+        write(current, args.output)
+
+    name = args.profile or profile(current["machine"])
+    path = baseline_path(name)
+    if args.save_baseline:
+        write(current, path)
+        print(f"Saved the baseline of {name} to {path}")
+        return 0
+    if not path.is_file():
+        print(f"No baseline of {name}, save one with --save-baseline")
+        return 0
+
+    baseline = json.loads(path.read_text())
+    if args.groups:
+        # only the gated benchmarks of the groups that ran can be missing
+        baseline["results"] = [
+            result for result in baseline["results"] if result["group"] in args.groups
+        ]
+    diffs = compare(baseline, current, args.threshold, args.alpha)
+    text = report(diffs, name)
+    print(text)
+    if args.report is not None:
+        args.report.write_text(text + "\n")
+    return int(bool(failed(diffs)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
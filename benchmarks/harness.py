@@ -0,0 +1,189 @@
+"""
+Registry and runner of the benchmarks.
+
+A benchmark is a function that does the setup for one set of parameters and returns
+the function to time. The timed function is called `warmup` times and then `repeat`
+times; every call is one sample. Setup is not timed, so a benchmark of a rebuild can
+build the model first and only time the rebuild. An `info` dict set on the timed
+function ends up in the results.
+
+With `memory`, the timed function is called once more while tracemalloc traces the
+allocations, for the peak of the Python memory it uses (`memory_peak`, in bytes).
+That call is not one of the samples, because tracing slows it down.
+"""
+
+import datetime
+import gc
+import json
+import os
+import pathlib
+import platform
+import random
+import statistics
+import subprocess
+import time
+import traceback
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+SCHEMA_VERSION = 1
+SEED = 20240607
+DEFAULT_REPEAT = 5
+DEFAULT_WARMUP = 1
+
+Setup = Callable[..., Callable[[], object]]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    group: str
+    setup: Setup
+    params: dict = field(default_factory=dict)
+
+    @property
+    def id(self) -> str:
+        if not self.params:
+            return self.name
+        args = ",".join(f"{key}={value}" for key, value in self.params.items())
+        return f"{self.name}[{args}]"
+
+
+BENCHMARKS: list[Benchmark] = []
+
+
+def benchmark(
+    name: str, group: str, params: Iterable[dict] = ({},)
+) -> Callable[[Setup], Setup]:
+    """Registers the decorated setup function, once for every set of `params`"""
+
+    def register(setup: Setup) -> Setup:
+        for kwargs in params:
+            BENCHMARKS.append(Benchmark(name, group, setup, dict(kwargs)))
+        return setup
+
+    return register
+
+
+def seed(value: int = SEED) -> np.random.Generator:
+    """Seeds the global random generators and returns a new numpy generator"""
+    random.seed(value)
+    np.random.seed(value)
+    return np.random.default_rng(value)
+
+
+def summary(samples: list[float]) -> dict:
+    return dict(
+        min=min(samples),
+        max=max(samples),
+        mean=statistics.fmean(samples),
+        median=statistics.median(samples),
+        stdev=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    )
+
+
+def memory_peak(timed: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        timed()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmark(
+    bench: Benchmark,
+    repeat: int = DEFAULT_REPEAT,
+    warmup: int = DEFAULT_WARMUP,
+    memory: bool = True,
+) -> dict:
+    result = dict(id=bench.id, name=bench.name, group=bench.group, params=bench.params)
+    seed()
+    try:
+        timed = bench.setup(**bench.params)
+    except ImportError as e:
+        return dict(result, status="skipped", reason=str(e))
+    except Exception:
+        return dict(result, status="error", reason=traceback.format_exc())
+
+    samples = []
+    try:
+        for _ in range(warmup):
+            timed()
+        for _ in range(repeat):
+            # collect the garbage of earlier samples outside of the timed call
+            gc.collect()
+            start = time.perf_counter()
+            timed()
+            samples.append(time.perf_counter() - start)
+        peak = memory_peak(timed) if memory else None
+    except Exception:
+        return dict(result, status="error", reason=traceback.format_exc())
+    info = getattr(timed, "info", {})
+    return dict(
+        result,
+        status="ok",
+        info=info,
+        unit="s",
+        samples=samples,
+        memory_peak=peak,
+        **summary(samples),
+    )
+
+
+def machine() -> dict:
+    return dict(
+        hostname=platform.node(),
+        system=platform.system(),
+        machine=platform.machine(),
+        processor=platform.processor(),
+        cpu_count=os.cpu_count(),
+        python=platform.python_version(),
+    )
+
+
+def commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=pathlib.Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run(
+    benchmarks: Iterable[Benchmark],
+    repeat: int = DEFAULT_REPEAT,
+    warmup: int = DEFAULT_WARMUP,
+    progress: Optional[Callable[[dict], None]] = None,
+    memory: bool = True,
+) -> dict:
+    """Runs `benchmarks` and returns the results document"""
+    results = []
+    for bench in benchmarks:
+        result = run_benchmark(bench, repeat, warmup, memory)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return dict(
+        schema=SCHEMA_VERSION,
+        created=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        commit=commit(),
+        machine=machine(),
+        settings=dict(repeat=repeat, warmup=warmup, seed=SEED, memory=memory),
+        results=results,
+    )
+
+
+def write(document: dict, path: pathlib.Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2))
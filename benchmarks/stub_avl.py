@@ -0,0 +1,65 @@
+"""
+Stand-in for the AVL binary.
+
+kbeutils ships AVL as a Windows executable. Where it cannot be run, the benchmarks
+replace `avlwrapper.Session.run_avl` by `run_stub`: the input files are still written
+(and the ParaPy model evaluated to write them), but no solver runs. The results have
+the structure of those of AVL, with coefficients from lifting-line theory, so the code
+that reads them works unchanged. Timings with the stub exclude the solver.
+"""
+
+import math
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+CD0 = 0.02
+OSWALD = 0.8
+
+
+def avl_available() -> bool:
+    from kbeutils.globs import BIN_DIR
+
+    return os.name == "nt" and os.path.isfile(os.path.join(BIN_DIR, "avl.exe"))
+
+
+def _alpha(case) -> float:
+    parameter = getattr(case, "parameters", {}).get("alpha")
+    value = getattr(parameter, "value", parameter)
+    return float(value) if isinstance(value, (int, float)) else 0.0
+
+
+def _totals(session, case) -> dict:
+    geometry = session.geometry
+    aspect_ratio = geometry.reference_span**2 / geometry.reference_area
+    cl = 2 * math.pi * math.radians(_alpha(case)) * aspect_ratio / (aspect_ratio + 2)
+    cd = CD0 + cl**2 / (math.pi * aspect_ratio * OSWALD)
+    return dict(Alpha=_alpha(case), CLtot=cl, CDtot=cd, Cmtot=0.0)
+
+
+def run_stub(session, cmds, pre_fn=None, post_fn=None, **kwargs) -> dict:
+    with tempfile.TemporaryDirectory(prefix="avl-stub-") as working_dir:
+        if pre_fn is not None:
+            pre_fn(working_dir)
+    return {
+        case.name: dict(Name=case.name, Totals=_totals(session, case))
+        for case in session.cases
+    }
+
+
+@contextmanager
+def stubbed_avl(stub: bool = True) -> Iterator[bool]:
+    """Replaces the AVL runs by run_stub inside the with block, if `stub`"""
+    if not stub:
+        yield False
+        return
+
+    import avlwrapper
+
+    original = avlwrapper.Session.run_avl
+    avlwrapper.Session.run_avl = run_stub
+    try:
+        yield True
+    finally:
+        avlwrapper.Session.run_avl = original
@@ -1,22 +1,33 @@
 from parapy.geom import Cube, Solid
 import os
+import uuid
+import weakref
 import glob
 from parapy.webgui import layout, mui, viewer
 from parapy.webgui.app_bar import AppBar
-from parapy.webgui.core import Component, NodeType, State, VState, get_assets_dir, get_asset_url, display
+from parapy.webgui.core import Component, NodeType, Prop, State, VState, get_assets_dir, get_asset_url, display
+from parapy.webgui.core.websocket.dispatchers import register_post_patch_action
 from parapy.webgui.core.actions import download_file
 from parapy.exchange import STEPWriter
-from parapy.geom import GeomBase
-from parapy.webgui.data_tree import DataTree
 from wand.image import Image
 
 from fede.convAera import Aircraft
+from fede.session_pool import ModelPool
 from fede.convAVL import ConvAnalysis, AvlAnalysis
 from fede.reporter import ReportConfig, create_pdf_report
+from fede.lazy_tree import LazyTree, ProfileAdapter, ResultsAdapter, StructureAdapter
+from fede.profiling import Profiler
 
+# Slot profiler, only when FEDE_PROFILE is set (see fede.profiling). It is started before
+# the pool builds the first models, so their evaluations are recorded as well.
+PROFILER = Profiler.from_env()
 
-# Instantiate Objects
-Aera =  ConvAnalysis(label="aircraft",
+# Adapter of the aircraft structure tree, one for all sessions and renders
+STRUCTURE_ADAPTER = StructureAdapter() if PROFILER is None else ProfileAdapter(PROFILER)
+
+
+# Inputs of the model every session starts from
+AERA_INPUTS = dict(label="aircraft",
                    fu_side=3.5,
                    fu_height = 5,
                    fu_distance = 50,
@@ -33,6 +44,9 @@ Aera =  ConvAnalysis(label="aircraft",
                    mesh_deflection=0.01,
                    mach_list=[0.1])
 
+# Every browser session (i.e. App instance) works on its own model from this pool
+POOL = ModelPool(ConvAnalysis, AERA_INPUTS, warm_paths=['avl_surfaces'], spares=1, memory_cap_mb=4096)
+
 
 
 
@@ -41,7 +55,23 @@ Aera =  ConvAnalysis(label="aircraft",
 
 
 class App(Component):
+    _session_key = None
+
+    @property
+    def model(self):
+        if self._session_key is None:
+            self._session_key = uuid.uuid4().hex
+            weakref.finalize(self, POOL.release, self._session_key)
+        return POOL.acquire(self._session_key)
+
+    def mount_node(self):
+        # build the clone for the next session on a thread of its own, once this page has been
+        # sent
+        register_post_patch_action(POOL.fill_in_background)
+        return super().mount_node()
+
     def render(self) -> NodeType:
+        model = self.model
         return (
             layout.Split(orientation='vertical',
                          height='100%',
@@ -57,62 +87,30 @@ class App(Component):
                                  weights=[1, 0])[
                         layout.Split(height='100%',
                                      weights=[1, 0, 1])[
-                            InputsPanelGeom,
+                            InputsPanelGeom(model=model),
                             mui.Divider(orientation='vertical'),
-                            InputsPanelAVL
+                            InputsPanelAVL(model=model)
 
                         ],
                         mui.Box()[
-                            ReportGenerator
+                            ReportGenerator(model=model)
                         ]
 
                     ],
                     mui.Divider(orientation='vertical'),
-                    viewer.Viewer(objects=Aera, style={'backgroundColor': 'gray'})
+                    viewer.Viewer(objects=model, style={'backgroundColor': 'gray'})
 
                 ]
             ]
         )
 
-# Tree view builder
-
-def build_data_items(obj: GeomBase, visited=None):
-    if visited is None:
-        visited = set()
-    obj_id = id(obj)
-    # Prevent infinite loops
-    if obj_id in visited:
-        # Fallback label when .label is None
-        base_label = getattr(obj, 'label', None) or obj.__class__.__name__
-        return {'id': str(obj_id), 'label': f"{base_label} (cycle)"}
-
-    visited.add(obj_id)
-    # Determine label, fallback to class name if None
-    base_label = getattr(obj, 'label', None) or obj.__class__.__name__
-    item = {'id': str(obj_id), 'label': base_label}
-
-    # Use children property (parapy Base.children)
-    children = []
-    for child in getattr(obj, 'children', []):
-        if isinstance(child, GeomBase):
-            children.append(child)
-
-    if children:
-        # Recursively build child entries
-        item['children'] = [build_data_items(child, visited) for child in children]
-    return item
-
-# Prepare tree data
-ITEMS = [build_data_items(Aera)]
-CONTROLS = {}
-MENU_ITEMS = {}
-GROUPS = {}
 
 
 
 
 class InputsPanelGeom(Component):
-    value = State(Aera.wing_dihedral) # Initial value for a variable configuration
+    model = Prop()  # the ConvAnalysis of this session
+    value = State(None) # Slider value, None until the slider is moved (shows the model dihedral)
     download_start = State(False) # State of download for the popup
     download_finish = State(False)
 
@@ -133,12 +131,12 @@ class InputsPanelGeom(Component):
         return layout.Box(orientation='vertical',
                           gap='1em',
                           style={'padding': '1em'})[
-            layout.SlotFloatField(Aera, 'fu_distance', label='Length Fuselage'),
-            layout.SlotFloatField(Aera, 'booms_length', label='Length Booms'),
-            layout.SlotFloatField(Aera, 'sweep', label='Sweep'),
-            mui.TextField(value=Aera.rotor_radius, label='Rotor Radius'),
+            layout.SlotFloatField(self.model, 'fu_distance', label='Length Fuselage'),
+            layout.SlotFloatField(self.model, 'booms_length', label='Length Booms'),
+            layout.SlotFloatField(self.model, 'sweep', label='Sweep'),
+            mui.TextField(value=self.model.rotor_radius, label='Rotor Radius'),
             mui.Typography('Wing Dihedral (°)'),
-            mui.Slider(value=self.value,
+            mui.Slider(value=self.model.wing_dihedral if self.value is None else self.value,
                        onChange=self.handle_change,
                        marks=self.marks,
                        min=-10,
@@ -148,6 +146,12 @@ class InputsPanelGeom(Component):
             mui.Button(onClick=self.on_click, variant="outlined")["Update wing dihedral"],
             mui.Button(variant='contained',
                        onClick=self.download_step)["Download .STEP file"],
+            mui.Typography('Aircraft structure'),
+            mui.Paper(sx={'p': 2, 'maxHeight': '300px', 'overflow': 'auto'})[
+                # children are only instantiated when a node is opened
+                LazyTree(name="aircraft", value=self.model,
+                         adapter=STRUCTURE_ADAPTER)
+            ],
             mui.Dialog(open=self.download_start)[
                 mui.DialogTitle['Downloading'],
                 mui.DialogContent[
@@ -165,7 +169,7 @@ class InputsPanelGeom(Component):
             ],
             viewer.Viewer(
                 id="myViewer",
-                objects=Aera,  # your Aircraft instance
+                objects=self.model,  # your Aircraft instance
                 style={"backgroundColor": "gray"},
             )
 
@@ -177,27 +181,28 @@ class InputsPanelGeom(Component):
 
     def handle_change(self, evt, new_value, *args) -> None:
         self.value = new_value
-        #Aera.wing_dihedral = new_value # If this line is active the model will update as soon as the slider is moved
+        #self.model.wing_dihedral = new_value # If this line is active the model will update as soon as the slider is moved
 
 
     def on_click(self, evt):
         new_value = self.value
-        Aera.wing_dihedral = new_value
+        if new_value is not None:
+            self.model.wing_dihedral = new_value
 
     def download_step(self, evt):
 
         '''
-        Reads the tree from Aera, writes all the parts into a STEP file and then downloads
+        Reads the tree from the model, writes all the parts into a STEP file and then downloads
         to assets folder.
         '''
         self.download_start = True
         print("downloading")
 
-        Aera.mesh_deflection = 0.0001
+        self.model.mesh_deflection = 0.0001
 
         # This second option looks at all the tree and outputs the writable objects
         writer = STEPWriter(
-            trees=[Aera],  # <-- give it the top-level Base
+            trees=[self.model],  # <-- give it the top-level Base
             schema="AP214IS",  # optional, you can choose another STEP schema here
             unit="MM",  # optional, default is millimeters
             color_mode=False,  # optional, include colors
@@ -205,14 +210,14 @@ class InputsPanelGeom(Component):
             name_mode=True,  # optional, include names
         )
 
-        print("Prop is a", type(Aera.fuselage.middle_fus))
+        print("Prop is a", type(self.model.fuselage.lofted_fus))
         assets_dir = get_assets_dir()
         filename = os.path.join(assets_dir, 'convAera_solid.step')
 
         writer.write(filename)
         url = get_asset_url(filename)
         download_file(url)
-        Aera.mesh_deflection = 0.01
+        self.model.mesh_deflection = 0.01
         self.download_start = False
         self.download_finish = True
         print("Download complete")
@@ -228,15 +233,18 @@ class InputsPanelGeom(Component):
 
 
 class InputsPanelAVL(Component):
+    model = Prop()  # the ConvAnalysis of this session
 
     process_start = State(False)
     process_running = State(False)
     process_finish = State(False)
 
     results = State(None) # Actual storage of the AVL analysis results
-    results_items = State([]) # For the tree view
     l_over_d = State(None)
 
+    # The results tree only builds the nodes that are opened, a page at a time
+    results_adapter = ResultsAdapter()
+
     def render(self) -> NodeType:
         return layout.Box(orientation='vertical',
                           gap='1em',
@@ -256,12 +264,8 @@ class InputsPanelAVL(Component):
 
             mui.Typography("AVL Results"),
             mui.Paper(sx={'p': 2, 'maxHeight': '300px', 'overflow': 'auto'})[
-                DataTree(
-                    items=self.results_items,
-                    controls={},
-                    menuItems={},
-                    groups={},
-                )
+                LazyTree(name="results", value=self.results, adapter=self.results_adapter)
+                if self.results else None
             ],
             mui.TextField(value=self.l_over_d, label='L/D'),
             mui.Button(onClick=lambda evt: self.print_avl_results(), variant="outlined")["Print results in console"],
@@ -275,7 +279,7 @@ class InputsPanelAVL(Component):
             ],
             viewer.Viewer(
                 id="myViewer",
-                objects=Aera,  # your Aircraft instance
+                objects=self.model,  # your Aircraft instance
                 style={"backgroundColor": "gray"},
             )
 
@@ -293,13 +297,12 @@ class InputsPanelAVL(Component):
 
     def on_click_avl(self, evt):
         #self.process_start = True
-        att = Aera.avl_analyses[0]
+        att = self.model.avl_analyses[0]
         print("started")
         self.results = att.results
         self.l_over_d = round(att.l_over_d['fixed_aoa'],2)
         print((self.results.keys()))
         self.process_running = False
-        self.results_items = self.build_results_items(self.results, name="results")
 
     def print_avl_results(self):
         """
@@ -309,11 +312,11 @@ class InputsPanelAVL(Component):
         self.print_dict_tree(self.results, name="results")
 
     def show_geom_avl(self, evt):
-        Aera.avl_analyses[0].show_geometry()
+        self.model.avl_analyses[0].show_geometry()
 
     def save_geom_plot(self, evt):
 
-        Aera.avl_analyses[0].save_geometry_plot()
+        self.model.avl_analyses[0].save_geometry_plot()
 
         ps_files = glob.glob(os.path.join(os.getcwd(), "*.ps"))
 
@@ -353,10 +356,10 @@ class InputsPanelAVL(Component):
 
 
     def show_tref_avl(self, evt):
-        Aera.avl_analyses[0].show_trefftz_plot()
+        self.model.avl_analyses[0].show_trefftz_plot()
 
     def save_tref_plot(self, evt):
-        Aera.avl_analyses[0].save_trefftz_plot()
+        self.model.avl_analyses[0].save_trefftz_plot()
         ps_files = glob.glob(os.path.join(os.getcwd(), "*.ps"))
 
 
@@ -420,59 +423,10 @@ class InputsPanelAVL(Component):
             else:
                 print(f"{prefix}{key}  [{type(val).__name__}]")
 
-    def build_results_items(self, data, name=None, path=""):
-        """
-        Walk `data` (dict/list/scalar) and build a list of DataTree nodes.
-        If `name` is given, we wrap everything under a single root node.
-        """
-        if name is not None:
-            # wrap top-level under a single “results/” node
-            root_id = path or name
-            root = {"id": root_id, "label": f"{name}/", "children": []}
-            for k, v in data.items():
-                root["children"].append(self._build_node(v, key=str(k), parent_path=root_id))
-            return [root]
-        else:
-            # unnamed top-level: list each key at root
-            items = []
-            for k, v in data.items():
-                items.append(self._build_node(v, key=str(k), parent_path=path))
-            return items
-
-    def _build_node(self, val, key: str, parent_path: str):
-        """
-        Recursive helper:
-        - dict   → node with children
-        - list   → node with children per index
-        - scalar → leaf node showing the actual value
-        """
-        node_id = f"{parent_path}/{key}"
-        node = {"id": node_id}
-
-        if isinstance(val, dict):
-            node["label"] = f"{key}/"
-            node["children"] = [
-                self._build_node(v, key=str(k), parent_path=node_id)
-                for k, v in val.items()
-            ]
-
-        elif isinstance(val, list):
-            node["label"] = f"{key} [list of {len(val)}]"
-            # make each list‐entry its own expandable node
-            node["children"] = [
-                self._build_node(item, key=str(i), parent_path=node_id)
-                for i, item in enumerate(val)
-            ]
-
-        else:
-            # leaf: show the actual value
-            node["label"] = f"{key}: {val!r}"
-
-        return node
-
 
 
 class ReportGenerator(Component):
+    model = Prop()  # the ConvAnalysis of this session
 
 
 
@@ -500,9 +454,9 @@ class ReportGenerator(Component):
             print("m_1_trefftz-0.jpg not found in assets_convAera. Making plots")
             self.save_tref_plot(evt)
 
-        if not Aera.avl_analyses[0]:
+        if not self.model.avl_analyses[0]:
             print("Results not found. Computing results")
-            Aera.avl_analyses[0].l_over_d()
+            self.model.avl_analyses[0].l_over_d()
 
         conf = ReportConfig(
             filename='convAera_report.pdf',
@@ -512,13 +466,14 @@ class ReportGenerator(Component):
                 'The analysis was run at a fixed angle of attack (AoA) of {AoA} degrees and then trimmed for '
                 'zero pitching moment. Computed values: L/D_fixed={L/D (fixed AoA)} and total lift={Total Lift (fixed AoA)}.'
             ),
-            data_object={
-                'AoA': 5,
-                'L/D (fixed AoA)': 8.2,
-                'Total Lift (fixed AoA)': 0.45,
-                'L/D (trimmed)': 7.8,
-                'Total Lift (trimmed)': 0.42,
+            data_object=self.model,
+            # only these slots of the model are evaluated for the report
+            fields={
+                'AoA': 'case_settings.0.1.alpha',
+                'L/D (fixed AoA)': 'avl_analyses.0.l_over_d.fixed_aoa',
+                'Total Lift (fixed AoA)': 'avl_analyses.0.total_lift.fixed_aoa',
             },
+            timing_appendix=True,
             image_files=['assets_convAera/M_1-geometry.jpeg', 'assets_convAera/M_1-trefftz-0.jpeg'],
             image_captions=['Geometry of the model.', 'Trefftz plane distribution.'],
             output_dir='assets_convAera'
@@ -533,7 +488,7 @@ class ReportGenerator(Component):
 
     def save_geom_plot(self, evt):
 
-        Aera.avl_analyses[0].save_geometry_plot()
+        self.model.avl_analyses[0].save_geometry_plot()
 
         ps_files = glob.glob(os.path.join(os.getcwd(), "*.ps"))
         assets = get_assets_dir()
@@ -567,7 +522,7 @@ class ReportGenerator(Component):
 
 
     def save_tref_plot(self, evt):
-        Aera.avl_analyses[0].save_trefftz_plot()
+        self.model.avl_analyses[0].save_trefftz_plot()
         ps_files = glob.glob(os.path.join(os.getcwd(), "*.ps"))
 
         assets = get_assets_dir()
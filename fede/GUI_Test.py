@@ -1,18 +1,21 @@
 from parapy.geom import Cube, Solid
 import os
+import uuid
+import weakref
 from parapy.webgui import layout, mui, viewer
 from parapy.webgui.app_bar import AppBar
-from parapy.webgui.core import Component, NodeType, State, VState, get_assets_dir, get_asset_url, display
+from parapy.webgui.core import Component, NodeType, Prop, State, VState, get_assets_dir, get_asset_url, display
+from parapy.webgui.core.websocket.dispatchers import register_post_patch_action
 from parapy.webgui.core.actions import download_file
 from parapy.exchange import STEPWriter
-from parapy.geom import GeomBase
-from parapy.webgui.data_tree import DataTree
+from fede.lazy_tree import LazyTree, StructureAdapter
 
 from fede.convAera import Aircraft
+from fede.session_pool import ModelPool
 from fede.convAVL import ConvAnalysis
 
-# Instantiate Objects
-Aera =  ConvAnalysis(label="aircraft",
+# Inputs of the model every session starts from
+AERA_INPUTS = dict(label="aircraft",
                    fu_side=3.5,
                    fu_height = 5,
                    fu_distance = 50,
@@ -28,6 +31,12 @@ Aera =  ConvAnalysis(label="aircraft",
                    booms_sections = [100, 100, 100, 100, 100],
                    mesh_deflection=0.01)
 
+# Every browser session (i.e. App instance) works on its own model from this pool
+POOL = ModelPool(ConvAnalysis, AERA_INPUTS, warm_paths=['avl_surfaces'], spares=1, memory_cap_mb=4096)
+
+# Adapter of the aircraft structure tree, one for all sessions and renders
+STRUCTURE_ADAPTER = StructureAdapter()
+
 
 
 
@@ -36,7 +45,23 @@ Aera =  ConvAnalysis(label="aircraft",
 
 
 class App(Component):
+    _session_key = None
+
+    @property
+    def model(self):
+        if self._session_key is None:
+            self._session_key = uuid.uuid4().hex
+            weakref.finalize(self, POOL.release, self._session_key)
+        return POOL.acquire(self._session_key)
+
+    def mount_node(self):
+        # build the clone for the next session on a thread of its own, once this page has been
+        # sent
+        register_post_patch_action(POOL.fill_in_background)
+        return super().mount_node()
+
     def render(self) -> NodeType:
+        model = self.model
         return (
             layout.Split(orientation='vertical',
                          height='100%',
@@ -47,67 +72,31 @@ class App(Component):
                 layout.Split(height='100%',
                              weights=[0, 0, 0, 1, 0, 0]
                              )[
-                    InputsPanel,
+                    InputsPanel(model=model),
                     mui.Divider(orientation='vertical'),
 
                     mui.Paper(sx={'p': 2, 'width': '300px', 'overflow': 'auto', 'maxHeight': '100%'})[
-                        DataTree(
-                            items=ITEMS,
-                            controls=CONTROLS,
-                            menuItems=MENU_ITEMS,
-                            groups=GROUPS,
-                        )
+                        # children are only instantiated when a node is opened
+                        LazyTree(name="aircraft", value=model, adapter=STRUCTURE_ADAPTER)
                     ],
-                    viewer.Viewer(objects=Aera,
+                    viewer.Viewer(objects=model,
                                   style={'backgroundColor': 'gray'}
                                   ),
                     mui.Divider(orientation='vertical'),
-                    viewer.Viewer(objects=Aera, style={'backgroundColor': 'gray'})
+                    viewer.Viewer(objects=model, style={'backgroundColor': 'gray'})
 
                 ]
             ]
         )
 
-# Tree view builder
-
-def build_data_items(obj: GeomBase, visited=None):
-    if visited is None:
-        visited = set()
-    obj_id = id(obj)
-    # Prevent infinite loops
-    if obj_id in visited:
-        # Fallback label when .label is None
-        base_label = getattr(obj, 'label', None) or obj.__class__.__name__
-        return {'id': str(obj_id), 'label': f"{base_label} (cycle)"}
-
-    visited.add(obj_id)
-    # Determine label, fallback to class name if None
-    base_label = getattr(obj, 'label', None) or obj.__class__.__name__
-    item = {'id': str(obj_id), 'label': base_label}
-
-    # Use children property (parapy Base.children)
-    children = []
-    for child in getattr(obj, 'children', []):
-        if isinstance(child, GeomBase):
-            children.append(child)
-
-    if children:
-        # Recursively build child entries
-        item['children'] = [build_data_items(child, visited) for child in children]
-    return item
-
-# Prepare tree data
-ITEMS = [build_data_items(Aera)]
-CONTROLS = {}
-MENU_ITEMS = {}
-GROUPS = {}
 
 
 
 
 
 class InputsPanel(Component):
-    value = State(Aera.wing_dihedral) # Initial value for a variable configuration
+    model = Prop()  # the ConvAnalysis of this session
+    value = State(None) # Slider value, None until the slider is moved (shows the model dihedral)
     download_start = State(False) # State of download for the popup
     download_finish = State(False)
 
@@ -143,12 +132,12 @@ class InputsPanel(Component):
         return layout.Box(orientation='vertical',
                           gap='1em',
                           style={'padding': '1em'})[
-            layout.SlotFloatField(Aera, 'fu_distance', label='Length Fuselage'),
-            layout.SlotFloatField(Aera, 'booms_length', label='Length Booms'),
-            layout.SlotFloatField(Aera, 'sweep', label='Sweep'),
-            mui.TextField(value=Aera.rotor_radius, label='Rotor Radius'),
+            layout.SlotFloatField(self.model, 'fu_distance', label='Length Fuselage'),
+            layout.SlotFloatField(self.model, 'booms_length', label='Length Booms'),
+            layout.SlotFloatField(self.model, 'sweep', label='Sweep'),
+            mui.TextField(value=self.model.rotor_radius, label='Rotor Radius'),
             mui.Typography('Wing Dihedral (°)'),
-            mui.Slider(value=self.value,
+            mui.Slider(value=self.model.wing_dihedral if self.value is None else self.value,
                        onChange=self.handle_change,
                        marks=self.marks,
                        min=-10,
@@ -175,7 +164,7 @@ class InputsPanel(Component):
             ],
             viewer.Viewer(
                 id="myViewer",
-                objects=Aera,  # your Aircraft instance
+                objects=self.model,  # your Aircraft instance
                 style={"backgroundColor": "gray"},
             )
 
@@ -187,27 +176,28 @@ class InputsPanel(Component):
 
     def handle_change(self, evt, new_value, *args) -> None:
         self.value = new_value
-        #Aera.wing_dihedral = new_value # If this line is active the model will update as soon as the slider is moved
+        #self.model.wing_dihedral = new_value # If this line is active the model will update as soon as the slider is moved
 
 
     def on_click(self, evt):
         new_value = self.value
-        Aera.wing_dihedral = new_value
+        if new_value is not None:
+            self.model.wing_dihedral = new_value
 
     def download_step(self, evt):
 
         '''
-        Reads the tree from Aera, writes all the parts into a STEP file and then downloads
+        Reads the tree from the model, writes all the parts into a STEP file and then downloads
         to assets folder.
         '''
         self.download_start = True
         print("downloading")
 
-        Aera.mesh_deflection = 0.0001
+        self.model.mesh_deflection = 0.0001
 
         # This second option looks at all the tree and outputs the writable objects
         writer = STEPWriter(
-            trees=[Aera],  # <-- give it the top-level Base
+            trees=[self.model],  # <-- give it the top-level Base
             schema="AP214IS",  # optional, you can choose another STEP schema here
             unit="MM",  # optional, default is millimeters
             color_mode=False,  # optional, include colors
@@ -215,14 +205,14 @@ class InputsPanel(Component):
             name_mode=True,  # optional, include names
         )
 
-        print("Prop is a", type(Aera.fuselage.middle_fus))
+        print("Prop is a", type(self.model.fuselage.lofted_fus))
         assets_dir = get_assets_dir()
         filename = os.path.join(assets_dir, 'convAera_solid.step')
 
         writer.write(filename)
         url = get_asset_url(filename)
         download_file(url)
-        Aera.mesh_deflection = 0.01
+        self.model.mesh_deflection = 0.01
         self.download_start = False
         self.download_finish = True
         print("Download complete")
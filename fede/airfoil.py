@@ -1,5 +1,6 @@
 
 import os
+from functools import lru_cache
 from parapy.core import Base, Attribute, Input, Part
 from parapy.geom import LoftedSolid, Rectangle, Vector, translate, GeomBase, FittedCurve, LoftedSurface
 import pandas as pd
@@ -23,22 +24,30 @@ class Airfoil(FittedCurve):
     def coords_list(self):
             """List of points defining the airfoil shape, read from a file in the airfoils folder of kbeutils.
             If you want to check out all the possible airfoils, left click + Ctrl on the airfoils folder at import. """
-            with open(os.path.join(self.airfoil_dir, self.airfoil_name + ".dat"), 'r') as f:
-                point_x_lst = []
-                point_z_lst = []
-                skip = 0
-                for line in f:
-                    try:
-                        x, z = line.split(maxsplit=1)
-                        point_x_lst.append(float(x))
-                        point_z_lst.append(float(z) * self.thickness_factor)
-                    except ValueError:
-                        if not skip:  # Skip the first line if it is a header
-                            skip = 1
-                            continue
-                        else:  # Next time a line is not readable, stop reading (it is usually a comment or source link)
-                            break
-            return [point_x_lst, point_z_lst]
+            point_x_lst, point_z_lst = read_airfoil_file(self.airfoil_dir, self.airfoil_name)
+            return [list(point_x_lst), [z * self.thickness_factor for z in point_z_lst]]
+
+
+@lru_cache(maxsize=None)
+def read_airfoil_file(airfoil_dir, airfoil_name):
+    """x and z coordinates in the .dat file of an airfoil. The file is only read once, all
+    Airfoil objects with the same airfoil_name share the (unscaled) coordinates."""
+    with open(os.path.join(airfoil_dir, airfoil_name + ".dat"), 'r') as f:
+        point_x_lst = []
+        point_z_lst = []
+        skip = 0
+        for line in f:
+            try:
+                x, z = line.split(maxsplit=1)
+                point_x_lst.append(float(x))
+                point_z_lst.append(float(z))
+            except ValueError:
+                if not skip:  # Skip the first line if it is a header
+                    skip = 1
+                    continue
+                else:  # Next time a line is not readable, stop reading (it is usually a comment or source link)
+                    break
+    return tuple(point_x_lst), tuple(point_z_lst)
 
 
 if __name__ == "__main__":
@@ -61,6 +61,8 @@ class Aircraft(GeomBase):
     #definition of the winglet
 
     winglet_c_tip: float = Input(0.002)
+    winglet_tolerance: float = Input(None)  # adaptive winglet stations, see Winglet.stations
+    winglet_smooth: bool = Input(False)  # smooth winglet loft through a few guide sections
 
 
     #definition of the landing gear
@@ -461,6 +463,8 @@ class Aircraft(GeomBase):
                        winglet_c_tip = self.winglet_c_tip,
                        winglet_sweep =self.sweep,
                        twist = self.twist,
+                       tolerance = self.winglet_tolerance,
+                       smooth = self.winglet_smooth,
                        position = rotate(translate(self.wing_tip_position, 'x', self.w_c_tip), 'z', radians(180)))
 
 
@@ -0,0 +1,139 @@
+import hashlib
+from math import comb
+
+import numpy as np
+
+"""Batched CST fits of many airfoils at once.
+
+`fit` fits the CST coefficients of the upper and lower side of every airfoil with one
+vectorized least-squares solve, instead of one kbeutils fit per airfoil. The coefficients
+are those of kbeutils (fit_cst_airfoil, cst_airfoil_coordinates): `order + 1` shape
+functions, the trailing edge thickness and the leading edge shaping term, so they can be
+fed to kbeutils and to quasi-3D codes alike.
+
+    coefficients = fit([(x, z) for x, z in airfoils], order=5)
+    upper, lower = coefficients[:, 0], coefficients[:, 1]
+
+The airfoils can have different numbers of points: the sides are padded to the longest
+one and the padding rows are left out of the fit by a zero weight. Fits are cached by the
+content (a hash of the coordinates) and the order, so the same airfoil in many sections
+or design variants is only fitted once per process; see `clear_cache`."""
+
+N1 = 0.5  # class function exponents of a round nose and a sharp trailing edge
+N2 = 1.0
+_CACHE = {}  # (content hash, order) -> (2, order + 3) array
+
+
+def content_hash(x, z):
+    """hash of the coordinates of an airfoil, the key of the cache"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(x, dtype=float).tobytes())
+    digest.update(np.ascontiguousarray(z, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+def clear_cache():
+    _CACHE.clear()
+
+
+def split(x, z):
+    """(x, z) of the upper and of the lower side, both from the nose to the trailing edge and
+    with x rescaled to 0..1, of coordinates that run from the trailing edge over the upper
+    side around the nose (the smallest x) and back over the lower side"""
+    x, z = np.asarray(x, dtype=float), np.asarray(z, dtype=float)
+    nose = int(np.argmin(x))
+    sides = []
+    for side_x, side_z in ((x[nose::-1], z[nose::-1]), (x[nose:], z[nose:])):
+        span = side_x.max() - side_x.min()
+        sides.append(((side_x - side_x.min()) / span, side_z))
+    return sides
+
+
+def cst_matrix(x, order, n1=N1, n2=N2):
+    """CST design matrix of the x-ordinates in the last axis of `x`, the columns in the last
+    axis of the result: the order + 1 shape functions, the trailing edge thickness and the
+    leading edge shaping term"""
+    x = np.asarray(x, dtype=float)[..., None]
+    i = np.arange(order + 1)
+    binomials = np.array([comb(order, k) for k in i], dtype=float)
+    cls = x ** n1 * (1 - x) ** n2
+    shapes = cls * binomials * x ** i * (1 - x) ** (order - i)
+    leading_edge = x ** n2 * (1 - x) ** n1 * (1 - x) ** order
+    return np.concatenate([shapes, x, leading_edge], axis=-1)
+
+
+def _pad(sides):
+    """padded (x, z) arrays of shape (sides, longest) and the mask of the real points"""
+    longest = max(len(x) for x, _ in sides)
+    x = np.zeros((len(sides), longest))
+    z = np.zeros((len(sides), longest))
+    mask = np.zeros((len(sides), longest), dtype=bool)
+    for idx, (side_x, side_z) in enumerate(sides):
+        x[idx, :len(side_x)] = side_x
+        z[idx, :len(side_z)] = side_z
+        mask[idx, :len(side_x)] = True
+    return x, z, mask
+
+
+def fit_sides(sides, order=5):
+    """CST coefficients of many sides, each (x, z) from the nose (x=0) to the trailing edge
+    (x=1); an array of shape (sides, order + 3)"""
+    x, z, mask = _pad(sides)
+    # remove the trailing edge thickness, the z of the last point of every side
+    z_te = z[np.arange(len(sides)), mask.sum(axis=1) - 1]
+    weight = mask.astype(float)
+    matrix = cst_matrix(x, order) * weight[..., None]
+    rhs = (z - x * z_te[:, None]) * weight
+    # least-squares solutions of all sides at once; the zero rows of the padding do not
+    # change them
+    coefficients = np.einsum('bkm,bm->bk', np.linalg.pinv(matrix), rhs)
+    coefficients[:, -2] = z_te
+    return coefficients
+
+
+def fit(airfoils, order=5, cache=True):
+    """CST coefficients of the upper and lower side of `airfoils`, (x, z) coordinates in the
+    order of `split`, as an array of shape (airfoils, 2, order + 3)"""
+    airfoils = list(airfoils)
+    keys = [(content_hash(x, z), order) for x, z in airfoils] if cache else [None] * len(airfoils)
+    todo = {}  # key (or index without a cache) -> airfoil, each new airfoil only once
+    for idx, (key, airfoil) in enumerate(zip(keys, airfoils)):
+        if key is None or key not in _CACHE:
+            todo.setdefault(idx if key is None else key, airfoil)
+    fitted = {}
+    if todo:
+        sides = [side for x, z in todo.values() for side in split(x, z)]
+        coefficients = fit_sides(sides, order).reshape(len(todo), 2, order + 3)
+        fitted = dict(zip(todo, coefficients))
+        if cache:
+            _CACHE.update(fitted)
+    result = np.empty((len(airfoils), 2, order + 3))
+    for idx, key in enumerate(keys):
+        result[idx] = fitted[idx] if key is None else _CACHE[key]
+    return result
+
+
+def fit_files(names, airfoil_dir=None, order=5, cache=True):
+    """fit of the .dat files of `names` in `airfoil_dir` (the airfoils of kbeutils by default)"""
+    from fede.airfoil import read_airfoil_file
+    if airfoil_dir is None:
+        from kbeutils.data import airfoils
+        airfoil_dir = airfoils.__path__[0]
+    return fit([read_airfoil_file(airfoil_dir, name) for name in names], order, cache)
+
+
+def fit_sections(sections, order=5, cache=True):
+    """fit of the unit airfoils of fede Section objects, e.g. of all lifting surfaces of an
+    aircraft: fit_sections(s for surface in surfaces for s in surface.sections)"""
+    airfoils = []
+    for section in sections:
+        x, _, z = zip(*section.airfoil.coordinates)
+        airfoils.append((x, z))
+    return fit(airfoils, order, cache)
+
+
+if __name__ == '__main__':
+    names = ['NACA2411', 'b29root', 'b29tip']
+    coefficients = fit_files(names)
+    for name, (upper, lower) in zip(names, coefficients):
+        print(f'{name:<12} upper {np.round(upper, 4)} lower {np.round(lower, 4)}')
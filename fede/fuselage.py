@@ -10,12 +10,30 @@ from fede import Frame
 from .liftingSurface import LiftingSurface
 import matplotlib.pyplot as plt
 from kbeutils.data import airfoils
+import numpy as np
+
+SECTIONS = [(-1 / 14, 0.1, 0.1, 0.),
+            (-1 / 25, 1 / 1.3, 1 / 1.3, 0.),
+            (0., 1., 1., 0.),
+            (0.75, 1., 1., 0.),
+            (0.75 + 1 / 16, 1 / 2.5, 1 / 2.5, 0.),
+            (0.75 + 1 / 8, 0.1, 0.1, 0.)]
+
+
 class Fuselage(GeomBase): # remember, we want to use the parapy environment, NO RANDOM TUTORIALS
     # 1) erediti da Base
     fu_side= Input(400)
     fu_height = Input(200)
     fu_distance = Input(1000)
     mesh_deflection = Input(1e-3)
+    # (station, width, height, corner radius) per section: the station as a fraction of fu_distance,
+    # the width and height as fractions of fu_side and fu_height, the corner radius as a fraction of
+    # half the smallest of them. The default is the nose, the straight middle and the tail cone.
+    sections = Input(SECTIONS)
+    corner_points = Input(8)  # points per rounded corner of the fitted sections
+    # straight between the sections, so the middle stays a box. A smooth loft (False) bulges out
+    # between sections that shrink sharply, and volume and wetted_area no longer hold for it.
+    ruled = Input(True)
     """
     @Attribute
     def __str__(self):
@@ -28,57 +46,85 @@ class Fuselage(GeomBase): # remember, we want to use the parapy environment, NO
         """to visualize the given lifting surface reference frame"""
         return Frame()
     @Attribute
-    def profiles(self):
-        return [self.initial_profile,
-                self.middle_profile,
-                self.final_profile]
+    def table(self):
+        """the section table as arrays: station (x), width, height and corner radius of every
+        section, in model units and in the order of the stations"""
+        rows = np.array(sorted(self.sections), dtype=float).reshape(-1, 4)
+        width = rows[:, 1] * self.fu_side
+        height = rows[:, 2] * self.fu_height
+        radius = rows[:, 3] * np.minimum(width, height) / 2
+        return rows[:, 0] * self.fu_distance, width, height, radius
+
     @Attribute
-    def back_profile(self):
-        return [self.back_initial_profile, self.back_middle_profile, self.back_final_profile]
+    def profile_points(self):
+        """closed outlines of the sections, as (x, y) in the plane of the section: the 4 corners of
+        a square section (radius 0) and the first one again, otherwise a curve with corner_points
+        per rounded corner.
+        All outlines are computed at once; points that coincide, where a side has no flat part
+        left between two rounded corners, are then dropped per section."""
+        station, width, height, radius = self.table
+        # corner centres in the order of the quadrants, counterclockwise
+        signs = np.array([(1, 1), (-1, 1), (-1, -1), (1, -1)])
+        half = np.stack([width, height], axis=1)[:, None, :] / 2
+        angles = np.linspace(0, np.pi / 2, self.corner_points)
+        arcs = np.concatenate([angles + quadrant * np.pi / 2 for quadrant in range(4)])
+        centres = np.repeat(signs, self.corner_points, axis=0)[None, :, :] * (half - radius[:, None, None])
+        points = centres + radius[:, None, None] * np.stack([np.cos(arcs), np.sin(arcs)], axis=1)[None]
+        points = np.concatenate([points, points[:, :1]], axis=1)
+        # a point is kept if it is away from the previous one
+        tolerance = 1e-9 * np.maximum(width, height)[:, None]
+        keep = np.concatenate([np.ones((len(points), 1), dtype=bool),
+                               np.hypot(*np.diff(points, axis=1).transpose(2, 0, 1)) > tolerance], axis=1)
+        return [(signs * half[idx])[[0, 1, 2, 3, 0]] if radius[idx] == 0 else points[idx][keep[idx]]
+                for idx in range(len(points))]
+
+    def section_position(self, idx):
+        return translate(self.position.rotate90('y'), Vector(1, 0, 0), self.table[0][idx])
 
     @Part
-    def middle_profile(self):
-        return Rectangle(width=self.fu_side/1.3, length=self.fu_height/1.3,
-                         position = translate(self.position.rotate90('y'), Vector(-1, 0, 0), self.fu_distance/25), color = "Black")
-    @Part
-    def initial_profile(self):
-        return Rectangle(width=self.fu_side/10, length=self.fu_height / 10,
-                         position = translate(self.position.rotate90('y'), Vector(-1, 0, 0), self.fu_distance / 14),
-                         color="Black")
+    def profiles(self):
+        """one section per row of the table: a polygon if its corners are square, otherwise a
+        curve fitted through its outline"""
+        return DynamicType(type=FittedCurve if self.table[3][child.index] > 0 else Polygon,
+                           quantify=len(self.table[0]),
+                           points=[self.section_position(child.index).translate('x', x, 'y', y).point
+                                   for x, y in self.profile_points[child.index]],
+                           color="Black")
 
     @Part
-    def final_profile(self):
-        return Rectangle(
-            width=self.fu_side,
-            length=self.fu_height,
-            color="Black",  position = translate(self.position.rotate90('y'))
-        )
+    def lofted_fus(self):
+        return LoftedSolid(profiles=self.profiles, ruled=self.ruled, color="Green", transparency=0.7)
 
-    @Part
-    def back_initial_profile(self):
-        return (Rectangle(width=self.fu_side , length=self.fu_height,
-                         position=translate(self.position.rotate90('y'), Vector(1, 0, 0), self.fu_distance*3/4),
-                         color="Black"))
-    @Part
-    def back_middle_profile(self):
-        return (Rectangle(width=self.fu_side / 2.5, length=self.fu_height/ 2.5,
-                         position=translate(self.position.rotate90('y'), Vector(1, 0, 0), self. fu_distance*3/4 + self.fu_distance / 16),
-                         color="Black"))
-    @Part
-    def back_final_profile(self):
-        return Rectangle(width=self.fu_side / 10, length=self.fu_height/10,
-                         position=translate(self.position.rotate90('y'), Vector(1, 0, 0),  self. fu_distance*3/4 + self.fu_distance / 8),
-                         color="Black")
-    @Part
-    def front_lofted_fus(self):
-        return LoftedSolid(profiles = self.profiles, color = "Green", transparency = 0.7)
-    @Part
-    def middle_fus(self):
-        return Box(width = self.fu_side, height = self.fu_height, length = self.fu_distance*3/4, color = "Red", transparency = 0.6, position = translate(self.position.rotate90('-z').rotate90('y'), '-x', self.fu_side/2, 'z', -self.fu_height/2))
+    @Attribute
+    def section_areas(self):
+        station, width, height, radius = self.table
+        return width * height - (4 - np.pi) * radius ** 2
 
-    @Part
-    def back_lofted_fus(self):
-        return LoftedSolid(profiles = self.back_profile, color = "Red")
+    @Attribute
+    def volume(self):
+        """volume of the ruled loft, without building it. Every segment is integrated with
+        Simpson's rule, which is exact for the quadratic section area of a ruled segment."""
+        station, width, height, radius = self.table
+        middle = (width[1:] + width[:-1]) / 2 * (height[1:] + height[:-1]) / 2 \
+            - (4 - np.pi) * ((radius[1:] + radius[:-1]) / 2) ** 2
+        areas = self.section_areas
+        return float(np.sum(np.diff(station) / 6 * (areas[:-1] + 4 * middle + areas[1:])))
+
+    @Attribute
+    def wetted_area(self):
+        """outer area of the ruled loft including the end sections, without building it. Exact
+        with square corners, where the sides are trapezoids that lean by half the change
+        of the width or height; rounded corners are estimated as quarter cones."""
+        station, width, height, radius = self.table
+        length = np.diff(station)
+        flat_width = width - 2 * radius
+        flat_height = height - 2 * radius
+        top_bottom = 2 * (flat_width[1:] + flat_width[:-1]) / 2 * np.hypot(length, np.diff(height) / 2)
+        sides = 2 * (flat_height[1:] + flat_height[:-1]) / 2 * np.hypot(length, np.diff(width) / 2)
+        lean = (np.diff(width) + np.diff(height)) / 4  # outward shift of a corner centre
+        corners = np.pi * (radius[1:] + radius[:-1]) * np.hypot(length, lean)
+        areas = self.section_areas
+        return float(np.sum(top_bottom + sides + corners) + areas[0] + areas[-1])
 
     "add way to size the battery, remember!!! it is inside the methods"
     @Part
@@ -0,0 +1,190 @@
+from functools import lru_cache
+from itertools import islice
+from numbers import Number
+
+from parapy.core import Part
+from parapy.geom import GeomBase
+from parapy.webgui import layout, mui
+from parapy.webgui.core import Component, NodeType, Prop, State
+
+"""Lazily expanded tree view for the web GUI.
+
+Unlike DataTree, which needs the complete item structure up front, a LazyTree only builds
+the nodes the user has opened. Every node is its own Component that keeps its expanded
+state and current page on the server; the children of a node are asked from a TreeAdapter
+when the node is opened, one page at a time, so only the visible rows cross the websocket."""
+
+
+class TreeAdapter:
+    """Tells the tree how to read a data structure. Subclass it for other kinds of data."""
+
+    page_size = 50  # children shown per page of an opened node
+
+    def label(self, name, value):
+        return str(name)
+
+    def has_children(self, value):
+        return False
+
+    def count(self, value):
+        """number of children of `value`"""
+        return 0
+
+    def children(self, value, start, stop):
+        """(name, child) pairs of the children `start` up to `stop` of `value`"""
+        return []
+
+
+class ResultsAdapter(TreeAdapter):
+    """Nested dicts and lists, such as the AVL results. Lists of numbers longer than
+    `summary_length` (strip forces, element forces, ...) are shown as a one-line summary
+    and their entries are paged."""
+
+    summary_length = 10
+
+    def label(self, name, value):
+        if isinstance(value, dict):
+            return f"{name}/"
+        if isinstance(value, (list, tuple)):
+            if len(value) > self.summary_length and self._is_numeric(value):
+                return (f"{name} [{len(value)} numbers] "
+                        f"min={min(value):.4g}, max={max(value):.4g}, mean={sum(value) / len(value):.4g}")
+            return f"{name} [list of {len(value)}]"
+        return f"{name}: {value!r}"
+
+    def has_children(self, value):
+        return isinstance(value, (dict, list, tuple)) and len(value) > 0
+
+    def count(self, value):
+        return len(value)
+
+    def children(self, value, start, stop):
+        items = value.items() if isinstance(value, dict) else enumerate(value)
+        return [(str(k), v) for k, v in islice(items, start, stop)]
+
+    @staticmethod
+    def _is_numeric(value):
+        return all(isinstance(v, Number) and not isinstance(v, bool) for v in value)
+
+
+@lru_cache(maxsize=None)
+def _has_parts(cls):
+    """whether instances of `cls` have Parts, i.e. children"""
+    return any(isinstance(slot, Part) for klass in cls.__mro__ for slot in vars(klass).values())
+
+
+class StructureAdapter(TreeAdapter):
+    """Product tree of a ParaPy model, e.g. the ConvAera aircraft. The `children` of an
+    object (and so its Parts) are only instantiated when its node is opened. Since every
+    node reads the children in its own render, an input change only re-renders the nodes
+    whose children were invalidated, not the whole tree."""
+
+    def label(self, name, value):
+        return getattr(value, 'label', None) or value.__class__.__name__
+
+    def has_children(self, value):
+        # from the class, so the children are not instantiated to draw the node
+        return isinstance(value, GeomBase) and _has_parts(type(value))
+
+    def count(self, value):
+        return len(self._geom_children(value))
+
+    def children(self, value, start, stop):
+        return [(str(idx), child) for idx, child in
+                enumerate(self._geom_children(value)[start:stop], start)]
+
+    @staticmethod
+    def _geom_children(value):
+        return [child for child in value.children if isinstance(child, GeomBase)]
+
+
+class ProfileAdapter(StructureAdapter):
+    """Product tree with, per object, the time its own slots took to evaluate while
+    `profiler` (a fede.profiling.Profiler) was running."""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def label(self, name, value):
+        label = super().label(name, value)
+        seconds, evaluations = self.profiler.object_stats(value)
+        if not evaluations:
+            return label
+        return f"{label}  ({seconds * 1000:.1f} ms, {evaluations} evaluations)"
+
+
+class TreeNode(Component):
+    name: str = Prop()
+    value = Prop()
+    adapter: TreeAdapter = Prop()
+    depth: int = Prop(0)
+
+    expanded = State(False)
+    page = State(0)
+    _page_of = None  # the value that `page` was set for
+
+    def toggle(self, evt):
+        self.expanded = not self.expanded
+
+    def current_page(self):
+        """`page`, or the first page once `value` is another object than the one it was
+        set for"""
+        return self.page if self._page_of is self.value else 0
+
+    def set_page(self, page):
+        self._page_of = self.value
+        self.page = page
+
+    def indent(self, depth):
+        return {'pl': 1 + 2 * depth, 'py': 0}
+
+    def pager(self, page, total):
+        size = self.adapter.page_size
+        first = page * size
+        return mui.ListItem(sx=self.indent(self.depth + 1))[
+            layout.Box(v_align='center', gap='0.5em')[
+                mui.IconButton(size='small', disabled=page == 0,
+                               onClick=lambda evt: self.set_page(page - 1))[mui.Icon['chevron_left']],
+                mui.Typography(variant='caption')[f"{first + 1}-{min(first + size, total)} of {total}"],
+                mui.IconButton(size='small', disabled=first + size >= total,
+                               onClick=lambda evt: self.set_page(page + 1))[mui.Icon['chevron_right']],
+            ]
+        ]
+
+    def render(self) -> NodeType:
+        adapter = self.adapter
+        expandable = adapter.has_children(self.value)
+        icon = ('expand_more' if self.expanded else 'chevron_right') if expandable else 'remove'
+        row = mui.ListItemButton(sx=self.indent(self.depth),
+                                 onClick=self.toggle if expandable else None)[
+            mui.ListItemIcon(sx={'minWidth': '2em'})[mui.Icon[icon]],
+            mui.ListItemText(primary=adapter.label(self.name, self.value)),
+        ]
+        if not (expandable and self.expanded):
+            return row
+
+        # children are only looked up for an opened node, and only for the current page
+        total = adapter.count(self.value)
+        # a page past the end, e.g. after the value lost children, shows the last one
+        page = min(self.current_page(), max(total - 1, 0) // adapter.page_size)
+        start = page * adapter.page_size
+        # keyed by name, so the state of a node stays with its child instead of going to
+        # whichever child is drawn at its position
+        children = [TreeNode(key=name, name=name, value=child, adapter=adapter,
+                             depth=self.depth + 1)
+                    for name, child in adapter.children(self.value, start, start + adapter.page_size)]
+        if total > adapter.page_size:
+            children.append(self.pager(page, total))
+        return [row, *children]
+
+
+class LazyTree(Component):
+    """Tree with a single root node called `name` that shows `value`."""
+    name: str = Prop()
+    value = Prop()
+    adapter: TreeAdapter = Prop()
+
+    def render(self) -> NodeType:
+        return mui.List(dense=True, disablePadding=True)[
+            TreeNode(name=self.name, value=self.value, adapter=self.adapter)
+        ]
@@ -10,6 +10,7 @@ from kbeutils.geom import Naca5AirfoilCurve, Naca4AirfoilCurve
 from parapy.geom import GeomBase, LoftedShell, MirroredSurface, rotate
 from fede import Airfoil, Frame
 from fede.section import Section
+from fede.cst import fit_sections
 
 
 
@@ -137,6 +138,12 @@ class LiftingSurface(LoftedSolid):  # note use of loftedSolid as superclass
                         )
 
 
+    @Attribute
+    def cst_coefficients(self):
+        """CST coefficients of the airfoils of all sections in one batched fit, shape
+        (sections, 2, order + 3) with the upper and lower side, see fede.cst"""
+        return fit_sections(self.sections)
+
     @Part
     def avl_surface(self):
         """Defines an AVL surface, based on the section camberlines"""
@@ -0,0 +1,219 @@
+import gc
+import json
+import os
+import tracemalloc
+
+from fede.profiling import slot_names
+
+"""Memory accounting of a model build per Part path.
+
+`account(model)` walks the product tree of `model` depth first and builds it one object
+at a time, measuring every step:
+
+- python: the Python heap, traced with tracemalloc
+- occ: native memory of evaluating the shape slots (SHAPE_SLOTS), i.e. the OCC shapes
+- tessellation: native memory of evaluating the TESSELLATION_SLOTS, the meshes the
+  viewer shows (with the model's mesh_deflection)
+
+Native memory is the growth of the resident set size (/proc/self/statm) minus that of the
+Python heap, so it is only measured on Linux. The children of an object are built before
+its own shape, because a loft (e.g. Winglet.lofted_winglet) needs the shapes of its
+profiles; the memory of the loft itself is then the object's own.
+
+Retained memory is what is still allocated after a step, peak the maximum during the
+build. `MemoryReport.subtree(path)` is an estimate of what dropping a subtree frees:
+memory that is shared with objects outside of it (cached files, common curves) is
+counted for whichever object allocated it first, and the allocator does not always
+return freed memory to the system."""
+
+SHAPE_SLOTS = ('faces', 'edges')
+TESSELLATION_SLOTS = ('tessellation',)
+KINDS = ('python', 'occ', 'tessellation')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss():
+    """resident set size of this process in bytes, None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return None
+
+
+class Node:
+    __slots__ = ('path', 'cls', 'own', 'children')
+
+    def __init__(self, path, cls):
+        self.path = path
+        self.cls = cls
+        self.own = dict.fromkeys(KINDS, 0)  # retained bytes per kind
+        self.children = []
+
+    def subtree(self):
+        """retained bytes per kind of this node and all its descendants"""
+        total = dict(self.own)
+        for child in self.children:
+            for kind, value in child.subtree().items():
+                total[kind] += value
+        return total
+
+
+class _Meter:
+    """measures the retained memory of a step and keeps the peaks of the build"""
+
+    def __init__(self):
+        self.rss_start = rss()
+        self.peak_python = 0
+        self.peak_rss = 0
+
+    def measure(self, fn):
+        """(result of fn(), retained Python bytes, retained native bytes)"""
+        tracemalloc.reset_peak()
+        python_before = tracemalloc.get_traced_memory()[0]
+        rss_before = rss()
+        result = fn()
+        python_now, python_peak = tracemalloc.get_traced_memory()
+        rss_now = rss()
+        self.peak_python = max(self.peak_python, python_peak)
+        python = python_now - python_before
+        if rss_now is None:
+            return result, python, 0
+        self.peak_rss = max(self.peak_rss, rss_now - self.rss_start)
+        return result, python, max(rss_now - rss_before - python, 0)
+
+
+def _evaluate(obj, names):
+    cls = type(obj)
+    for name in names:
+        if hasattr(cls, name):
+            getattr(obj, name)
+
+
+def _items(name, value):
+    """(path step, child) of the value of Part `name`; the items of a quantified Part are
+    `name[index]`"""
+    if isinstance(value, (list, tuple)) or type(value).__name__ in ('Sequence', 'MutableSequence'):
+        return [(f'{name}[{idx}]', item) for idx, item in enumerate(value)]
+    return [] if value is None else [(name, value)]
+
+
+class MemoryReport:
+
+    def __init__(self, root, peak_python, peak_rss, retained_python, retained_rss):
+        self.root = root
+        self.peak_python = peak_python  # bytes of traced Python memory
+        self.peak_rss = peak_rss  # growth of the resident set size, None without /proc
+        self.retained_python = retained_python
+        self.retained_rss = retained_rss
+
+    def nodes(self):
+        todo = [self.root]
+        while todo:
+            node = todo.pop()
+            yield node
+            todo.extend(reversed(node.children))
+
+    def find(self, path):
+        for node in self.nodes():
+            if node.path == path:
+                return node
+        raise KeyError(path)
+
+    def subtree(self, path=''):
+        """bytes per kind (and 'total') that dropping the subtree at `path` would free"""
+        total = self.find(path).subtree()
+        total['total'] = sum(total.values())
+        return total
+
+    def rows(self, sort='total', descending=True):
+        rows = []
+        for node in self.nodes():
+            subtree = node.subtree()
+            rows.append(dict(path=node.path or '<root>', cls=node.cls,
+                             **{kind: node.own[kind] for kind in KINDS},
+                             total=sum(subtree.values()), **{f'subtree_{kind}': subtree[kind] for kind in KINDS}))
+        return sorted(rows, key=lambda row: row[sort], reverse=descending)
+
+    def table(self, sort='total', limit=None):
+        """per Part path its own memory and that of its subtree, in MiB"""
+        mib = 2 ** 20
+        header = (f"{'path':<48} {'class':<20} {'python':>8} {'occ':>8} {'tess':>8} "
+                  f"{'subtree':>9}")
+        lines = [header, '-' * len(header)]
+        for row in self.rows(sort)[:limit]:
+            lines.append(f"{row['path']:<48} {row['cls']:<20} {row['python'] / mib:>8.2f} "
+                         f"{row['occ'] / mib:>8.2f} {row['tessellation'] / mib:>8.2f} "
+                         f"{row['total'] / mib:>9.2f}")
+        lines.append('')
+        lines.append(f"peak: {self.peak_python / mib:.1f} MiB Python"
+                     + ('' if self.peak_rss is None else f", {self.peak_rss / mib:.1f} MiB resident"))
+        lines.append(f"retained: {self.retained_python / mib:.1f} MiB Python"
+                     + ('' if self.retained_rss is None else f", {self.retained_rss / mib:.1f} MiB resident"))
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        return dict(peak_python=self.peak_python, peak_rss=self.peak_rss,
+                    retained_python=self.retained_python, retained_rss=self.retained_rss,
+                    nodes=self.rows(sort='path', descending=False))
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+def account(model, shape_slots=SHAPE_SLOTS, tessellation_slots=TESSELLATION_SLOTS):
+    """builds `model` (which should not have been built yet) and returns a MemoryReport of
+    the memory of every Part path"""
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    gc.collect()
+    meter = _Meter()
+    python_start = tracemalloc.get_traced_memory()[0]
+
+    def build(obj, path):
+        node = Node(path, type(obj).__name__)
+        for name in sorted(slot_names(type(obj), ['Part'])):
+            # instantiating the Part is memory of its objects, shared by the items of a
+            # quantified Part
+            value, python, native = meter.measure(lambda: getattr(obj, name))
+            items = _items(name, value)
+            for step, child in items:
+                child_node = build(child, f'{path}.{step}' if path else step)
+                child_node.own['python'] += python // len(items)
+                child_node.own['occ'] += native // len(items)
+                node.children.append(child_node)
+        _, python, native = meter.measure(lambda: _evaluate(obj, shape_slots))
+        node.own['python'] += python
+        node.own['occ'] += native
+        _, python, native = meter.measure(lambda: _evaluate(obj, tessellation_slots))
+        node.own['python'] += python
+        node.own['tessellation'] += native
+        return node
+
+    try:
+        root = build(model, '')
+        python_end = tracemalloc.get_traced_memory()[0]
+        rss_end = rss()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return MemoryReport(root, meter.peak_python, None if meter.rss_start is None else meter.peak_rss,
+                        python_end - python_start,
+                        None if meter.rss_start is None else rss_end - meter.rss_start)
+
+
+if __name__ == '__main__':
+    from fede.convAera import Aircraft
+
+    # full fidelity: fine meshes, 6-blade propellers and 20-station winglets (defaults)
+    aircraft = Aircraft(label="aircraft", fu_side=3.5, fu_height=5, fu_distance=50,
+                        airfoil_root_name="b29root", airfoil_tip_name="b29tip",
+                        w_c_root=9., w_c_tip=2.3, w_semi_span=35., sweep=25, twist=-5,
+                        booms_radius=0.5, booms_length=60, booms_sections=[100, 100, 100, 100, 100],
+                        mesh_deflection=1e-4)
+    report = account(aircraft)
+    print(report.table(limit=40))
+    report.write_json('aircraft_memory.json')
@@ -0,0 +1,320 @@
+import atexit
+import csv
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import defaultdict
+
+"""Opt-in profiler of the slot evaluations of the fede object model.
+
+While a Profiler runs, the `__getattribute__` of the profiled classes (by default all
+ParaPy classes defined in fede) is wrapped: every access of a slot (Input, Attribute or
+Part) is timed. A profile hook (sys.setprofile, installed in every thread with
+threading.setprofile) sees whether the function of the slot is called during the
+access; if it is, the access was an evaluation, otherwise a cache hit. Per class and
+slot the profiler keeps the number of accesses and evaluations, the cumulative time and
+the self time (without the slots accessed during the evaluation). Every thread has a
+timeline of its own, e.g. every session of the web GUI.
+
+Export the results with `table` / `write_csv` (a table sortable on any column) and
+`write_speedscope` (a flame graph of the evaluations per thread for
+https://www.speedscope.app);
+lazy_tree.ProfileAdapter shows the time per object in the web GUI tree. Start it for
+the GUI by setting FEDE_PROFILE, see `from_env`.
+
+    with Profiler() as profiler:
+        Aircraft(**inputs).right_wing.solid
+    print(profiler.table(sort='self_time', limit=20))
+
+Profiling slows the evaluations down a lot; compare the numbers with each other, not
+with timings of an unprofiled run."""
+
+FEDE_DIR = os.path.dirname(os.path.abspath(__file__))
+COLUMNS = ['class', 'slot', 'calls', 'evaluations', 'hit_ratio', 'total', 'self_time',
+           'per_evaluation']
+
+
+def fede_classes():
+    """ParaPy classes defined in the modules of the fede folder"""
+    from parapy.core import Base
+    found, todo, seen = [], [Base], set()
+    while todo:
+        for sub in todo.pop().__subclasses__():
+            if sub in seen:
+                continue
+            seen.add(sub)
+            todo.append(sub)
+            path = getattr(sys.modules.get(sub.__module__), '__file__', None)
+            if path and os.path.dirname(os.path.abspath(path)) == FEDE_DIR:
+                found.append(sub)
+    return found
+
+
+def slot_names(cls, kinds=None):
+    """names of the slots of `cls`, i.e. the ParaPy descriptors in its class dicts. Only
+    those of the descriptor classes named in `kinds` (e.g. ['Part']), if given."""
+    return {name for klass in cls.__mro__ for name, value in vars(klass).items()
+            if not isinstance(value, type) and type(value).__module__.startswith('parapy.core')
+            and (kinds is None or type(value).__name__ in kinds)}
+
+
+class SlotStats:
+    __slots__ = ('calls', 'evaluations', 'total', 'self_time')
+
+    def __init__(self):
+        self.calls = 0  # accesses
+        self.evaluations = 0  # accesses that called the slot function
+        self.total = 0.0  # seconds, including the slots accessed from this one
+        self.self_time = 0.0
+
+    @property
+    def hit_ratio(self):
+        return 1 - self.evaluations / self.calls if self.calls else 0.0
+
+    @property
+    def per_evaluation(self):
+        return self.self_time / self.evaluations if self.evaluations else 0.0
+
+
+class Profiler:
+
+    def __init__(self, classes=None):
+        self.classes = classes  # None: fede_classes() when started
+        self.stats = defaultdict(SlotStats)  # (class name, slot) -> SlotStats
+        # id(obj) -> [weak reference to obj, self time, evaluations]; the reference tells
+        # obj from an object that got its id after obj was collected
+        self._objects = {}
+        self._frames = {}  # 'Class.slot' -> index, of the speedscope frames
+        self._timelines = []  # (thread name, speedscope events: [type, frame, time])
+        self._lock = threading.Lock()  # of stats, _objects, _frames and _timelines
+        self._local = threading.local()
+        self._installed = {}  # class -> its own __getattribute__ or None
+        self._started = None
+        self._stopped = None
+
+    @classmethod
+    def from_env(cls, variable='FEDE_PROFILE'):
+        """A started profiler if `variable` is set, None otherwise. The value is the folder
+        the results are written to when the process exits ('1' for fede_profile)."""
+        value = os.getenv(variable)
+        if not value:
+            return None
+        directory = 'fede_profile' if value == '1' else value
+        profiler = cls().start()
+        atexit.register(profiler.dump, directory)
+        return profiler
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def running(self):
+        return bool(self._installed)
+
+    def start(self):
+        if self.running:
+            return self
+        classes = fede_classes() if self.classes is None else list(self.classes)
+        # the originals are read before any class is wrapped, otherwise the wrapper of a
+        # subclass would call the one of its base class and count every access twice
+        originals = {klass: klass.__getattribute__ for klass in classes}
+        for klass in classes:
+            self._installed[klass] = vars(klass).get('__getattribute__')
+            klass.__getattribute__ = self._wrap(originals[klass], frozenset(slot_names(klass)))
+        self._started = time.perf_counter()
+        self._stopped = None
+        # the threads started from now on, and this one; the threads that are running
+        # already install the hook themselves, at their next profiled access
+        threading.setprofile(self._on_call)
+        sys.setprofile(self._on_call)
+        return self
+
+    def stop(self):
+        if not self.running:
+            return
+        # the other threads remove their hook at their next call, see _on_call
+        threading.setprofile(None)
+        sys.setprofile(None)
+        for klass, own in self._installed.items():
+            if own is None:
+                del klass.__getattribute__
+            else:
+                klass.__getattribute__ = own
+        self._installed = {}
+        self._stopped = time.perf_counter()
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self._objects.clear()
+            self._frames.clear()
+            for _, events in self._timelines:
+                events.clear()
+        self._started = time.perf_counter()
+
+    # recording
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+            self._local.events = []
+            with self._lock:
+                self._timelines.append((threading.current_thread().name,
+                                        self._local.events))
+        if sys.getprofile() is None:
+            sys.setprofile(self._on_call)
+        return stack
+
+    def _frame(self, name):
+        frame = self._frames.get(name)
+        if frame is None:
+            with self._lock:
+                frame = self._frames.setdefault(name, len(self._frames))
+        return frame
+
+    def _object_totals(self, obj):
+        entry = self._objects.get(id(obj))
+        if entry is None or entry[0]() is not obj:
+            try:
+                entry = self._objects[id(obj)] = [weakref.ref(obj), 0.0, 0]
+            except TypeError:  # not weakly referenceable, not kept per object
+                entry = [None, 0.0, 0]
+        return entry
+
+    def _wrap(self, original, slots):
+        profiler = self
+
+        def __getattribute__(obj, name):
+            if name not in slots:
+                return original(obj, name)
+            return profiler._access(original, obj, name)
+        return __getattribute__
+
+    def _on_call(self, frame, event, arg):
+        if not self.running:
+            sys.setprofile(None)
+            return
+        if event != 'call':
+            return
+        stack = getattr(self._local, 'stack', None)
+        if not stack:
+            return
+        record = stack[-1]
+        code = frame.f_code
+        if record[2] or code.co_name != record[1] or not code.co_argcount:
+            return
+        if frame.f_locals.get(code.co_varnames[0]) is record[0]:
+            record[2] = True
+
+    def _access(self, original, obj, name):
+        stack = self._stack()
+        events = self._local.events
+        record = [obj, name, False, 0.0]  # object, slot, evaluated, time of nested slots
+        key = (type(obj).__name__, name)
+        frame = self._frame('.'.join(key))
+        opened = len(events)
+        stack.append(record)
+        start = time.perf_counter()
+        events.append(['O', frame, start - self._started])
+        try:
+            return original(obj, name)
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            elapsed = end - start
+            evaluated, nested = record[2], record[3]
+            if stack:
+                stack[-1][3] += elapsed
+            with self._lock:
+                stats = self.stats[key]
+                stats.calls += 1
+                stats.total += elapsed
+                stats.self_time += elapsed - nested
+                if evaluated:
+                    stats.evaluations += 1
+                    totals = self._object_totals(obj)
+                    totals[1] += elapsed - nested
+                    totals[2] += 1
+            if not evaluated and len(events) == opened + 1:
+                # a cache hit is left out of the flame graph
+                events.pop()
+            else:
+                events.append(['C', frame, end - self._started])
+
+    # results
+
+    def object_stats(self, obj):
+        """(self time, evaluations) of the slots of `obj`"""
+        entry = self._objects.get(id(obj))
+        if entry is None or entry[0]() is not obj:
+            return 0.0, 0
+        return entry[1], entry[2]
+
+    def rows(self, sort='self_time', descending=True):
+        rows = [dict(zip(COLUMNS, (cls_name, slot, s.calls, s.evaluations, s.hit_ratio,
+                                   s.total, s.self_time, s.per_evaluation)))
+                for (cls_name, slot), s in self.stats.items()]
+        return sorted(rows, key=lambda row: row[sort], reverse=descending)
+
+    def table(self, sort='self_time', descending=True, limit=None):
+        """the statistics as text, times in milliseconds"""
+        rows = self.rows(sort, descending)[:limit]
+        header = (f"{'class':<24} {'slot':<32} {'calls':>7} {'evals':>7} {'hits':>6} "
+                  f"{'total ms':>10} {'self ms':>10} {'ms/eval':>9}")
+        lines = [header, '-' * len(header)]
+        for row in rows:
+            lines.append(f"{row['class']:<24} {row['slot']:<32} {row['calls']:>7} "
+                         f"{row['evaluations']:>7} {row['hit_ratio']:>6.0%} "
+                         f"{row['total'] * 1000:>10.2f} {row['self_time'] * 1000:>10.2f} "
+                         f"{row['per_evaluation'] * 1000:>9.3f}")
+        return '\n'.join(lines)
+
+    def write_csv(self, path, sort='self_time'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.rows(sort))
+        return path
+
+    def speedscope(self, name='fede slots'):
+        """the evaluations in the evented format of speedscope, one profile per thread"""
+        end = (self._stopped or time.perf_counter()) - self._started
+        with self._lock:
+            frames = sorted(self._frames, key=self._frames.get)
+            timelines = [(thread, list(events)) for thread, events in self._timelines
+                         if events]
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'fede.profiling',
+            'shared': {'frames': [{'name': frame} for frame in frames]},
+            'profiles': [{
+                'type': 'evented',
+                'name': f'{name} ({thread})',
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': max([end] + [at for _, _, at in events]),
+                'events': [{'type': kind, 'frame': frame, 'at': at}
+                           for kind, frame, at in events],
+            } for thread, events in timelines],
+        }
+
+    def write_speedscope(self, path, name='fede slots'):
+        with open(path, 'w') as f:
+            json.dump(self.speedscope(name), f)
+        return path
+
+    def dump(self, directory):
+        """writes slots.txt, slots.csv and speedscope.json to `directory`"""
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'slots.txt'), 'w') as f:
+            f.write(self.table() + '\n')
+        self.write_csv(os.path.join(directory, 'slots.csv'))
+        self.write_speedscope(os.path.join(directory, 'speedscope.json'))
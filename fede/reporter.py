@@ -1,8 +1,13 @@
+import hashlib
 import os
+import tempfile
+import time
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from fpdf import FPDF
-from dataclasses import dataclass, field
-from typing import List, Any, Dict
+from dataclasses import dataclass, field, replace
+from typing import List, Any, Dict, Iterator, Optional, Sequence, Union
 
 # Default text templates
 DEFAULT_PROGRAM_DESCRIPTION = (
@@ -14,12 +19,88 @@ DEFAULT_PARAMETERS_TEMPLATE = (
     'zero pitching moment. Computed values: L/D_fixed={L_D_fixed}, total lift={Total_Lift_fixed}.'
 )
 
+SKIPPED_FIELD = '[skipped: time budget exceeded]'
+# prepared images are kept here between report runs, named after their content hash
+DEFAULT_IMAGE_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'convaera_report_images')
+
+
+def resolve_path(obj: Any, path: str) -> Any:
+    """
+    Follows a dotted path such as ``'avl_analyses.0.l_over_d.fixed_aoa'`` starting at `obj`.
+    Every step is a dict key, a sequence index (numeric step) or an attribute, so only the
+    slots named in the path get evaluated on a ParaPy object. A numeric step is an int key of
+    a dict that does not have it as a string key.
+    """
+    for step in path.split('.'):
+        if isinstance(obj, Mapping):
+            if step not in obj and step.isdigit() and int(step) in obj:
+                step = int(step)
+            obj = obj[step]
+        elif step.isdigit():
+            obj = obj[int(step)]
+        else:
+            obj = getattr(obj, step)
+    return obj
+
+
+class FieldData(Mapping):
+    """
+    Lazy mapping of report labels to values behind dotted paths into a data object.
+
+    A value is only computed when it is looked up (by the parameters template or the results
+    table) and it is computed once. The time spent on every field is kept in `timings`; once
+    the total exceeds `budget` (seconds) the remaining fields are not evaluated anymore and
+    show up as SKIPPED_FIELD.
+    """
+    def __init__(self, source: Any, paths: Dict[str, str], budget: Optional[float] = None):
+        self.source = source
+        self.paths = dict(paths)
+        self.budget = budget
+        self.timings: Dict[str, float] = {}
+        self._values: Dict[str, Any] = {}
+
+    @property
+    def elapsed(self) -> float:
+        return sum(self.timings.values())
+
+    def __getitem__(self, label: str) -> Any:
+        if label in self._values:
+            return self._values[label]
+        path = self.paths[label]  # KeyError for unknown labels, as for a dict
+        if self.budget is not None and self.elapsed >= self.budget:
+            return SKIPPED_FIELD
+        start = time.perf_counter()
+        value = resolve_path(self.source, path)
+        self.timings[label] = time.perf_counter() - start
+        self._values[label] = value
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.paths)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def detach(self) -> 'FieldData':
+        """
+        Evaluates all fields and drops the reference to the data object, so the values (and
+        timings) can be sent to another process.
+        """
+        for label in self.paths:
+            self[label]
+        self.source = None
+        return self
+
+
 @dataclass
 class ReportConfig:
     """
     Configuration for generating a PDF report.
 
     Pass in your analysis data object, which can be a dict or have attributes.
+    With `fields` only the listed values end up in the report, e.g.
+    ``fields={'L/D (fixed AoA)': 'avl_analyses.0.l_over_d.fixed_aoa'}``; a list of paths uses
+    the paths themselves as labels.
     """
     filename: str
     title: str
@@ -29,11 +110,24 @@ class ReportConfig:
     output_dir: str = ''
     program_description: str = DEFAULT_PROGRAM_DESCRIPTION
     parameters_template: str = DEFAULT_PARAMETERS_TEMPLATE
+    fields: Union[Dict[str, str], List[str]] = field(default_factory=dict)  # label -> dotted path
+    field_budget: Optional[float] = None  # seconds available to evaluate all fields
+    timing_appendix: bool = False  # add a page with the evaluation time of every field
+    image_dpi: Optional[int] = 150  # print resolution of the images, None embeds the files as they are
+    image_quality: int = 85  # JPEG quality of the re-encoded images
+    image_cache_dir: str = DEFAULT_IMAGE_CACHE_DIR
+
+    def get_field_paths(self) -> Dict[str, str]:
+        if isinstance(self.fields, dict):
+            return dict(self.fields)
+        return {path: path for path in self.fields}
 
-    def get_data_dict(self) -> Dict[str, Any]:
+    def get_data_dict(self) -> Mapping:
         """
-        Returns a dict of parameter names to values for templating and table.
+        Returns a mapping of parameter names to values for templating and table.
         """
+        if self.fields:
+            return FieldData(self.data_object, self.get_field_paths(), budget=self.field_budget)
         if isinstance(self.data_object, dict):
             return self.data_object
         # try to convert attributes to dict
@@ -66,19 +160,24 @@ class PDFReport(FPDF):
         self.cell(0, 10, page_text, align='C')
 
 
-def create_pdf_report(config: ReportConfig) -> None:
+def _output_path(config: ReportConfig) -> str:
+    if config.output_dir:
+        os.makedirs(config.output_dir, exist_ok=True)
+        return os.path.join(config.output_dir, config.filename)
+    return config.filename
+
+
+def create_pdf_report(config: ReportConfig, data: Optional[Mapping] = None) -> str:
     """
-    Generates a PDF report based on ReportConfig.
+    Generates a PDF report based on ReportConfig and returns the path of the written file.
+    `data` can be passed when the values were already extracted from the data object.
     """
     # Prepare output path
-    if config.output_dir:
-        os.makedirs(config.output_dir, exist_ok=True)
-        output_path = os.path.join(config.output_dir, config.filename)
-    else:
-        output_path = config.filename
+    output_path = _output_path(config)
 
     # Extract data dict
-    data = config.get_data_dict()
+    if data is None:
+        data = config.get_data_dict()
 
     pdf = PDFReport(config.title)
     pdf.alias_nb_pages()
@@ -109,12 +208,12 @@ def create_pdf_report(config: ReportConfig) -> None:
     pdf.cell(0, 10, 'Chosen Parameters', ln=True)
     pdf.ln(5)
     pdf.set_font('Arial', '', 12)
-    # Format parameters description
-    params_text = config.parameters_template.format(**data)
+    # Format parameters description (format_map only looks up the names used in the template)
+    params_text = config.parameters_template.format_map(data)
     pdf.multi_cell(0, 8, params_text, align='J')
 
     # Images
-    for idx, img in enumerate(config.image_files):
+    for idx, img in enumerate(_prepared_images(config)):
         pdf.add_page()
         try:
             usable_width = pdf.w - pdf.l_margin - pdf.r_margin
@@ -145,5 +244,169 @@ def create_pdf_report(config: ReportConfig) -> None:
         pdf.cell(col_width, row_height, str(key), border=1)
         pdf.cell(col_width, row_height, str(val), border=1, ln=True)
 
+    if config.timing_appendix and isinstance(data, FieldData):
+        _add_timing_appendix(pdf, data)
+
     # Save
-    pdf.output(output_path)
\ No newline at end of file
+    pdf.output(output_path)
+    return output_path
+
+def _add_timing_appendix(pdf: PDFReport, data: FieldData) -> None:
+    """
+    Appendix listing the dotted path of every field and the time it took to evaluate it.
+    """
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, 'Appendix: field evaluation', ln=True)
+    pdf.ln(5)
+    usable_width = pdf.w - pdf.l_margin - pdf.r_margin
+    widths = (usable_width * 0.3, usable_width * 0.5, usable_width * 0.2)
+    row_height = pdf.font_size * 2
+    pdf.set_fill_color(200, 200, 200)
+    pdf.set_font('Arial', 'B', 12)
+    for width, header in zip(widths, ('Field', 'Path', 'Time [ms]')):
+        pdf.cell(width, row_height, header, border=1, fill=True)
+    pdf.ln()
+    pdf.set_font('Arial', '', 10)
+    for label, path in data.paths.items():
+        timing = data.timings.get(label)
+        pdf.cell(widths[0], row_height, str(label), border=1)
+        pdf.cell(widths[1], row_height, path, border=1)
+        pdf.cell(widths[2], row_height, 'skipped' if timing is None else f'{timing * 1000:.2f}',
+                 border=1, ln=True)
+    pdf.set_font('Arial', 'I', 10)
+    pdf.cell(0, row_height, f'Total: {data.elapsed * 1000:.2f} ms', ln=True)
+
+
+def _render_report(config: ReportConfig, data: Mapping) -> str:
+    # module level so it can be pickled for the worker processes
+    return create_pdf_report(config, data)
+
+
+def _detached_data(config: ReportConfig) -> Mapping:
+    data = config.get_data_dict()
+    if isinstance(data, FieldData):
+        return data.detach()
+    return dict(data)
+
+
+def _usable_width_mm() -> float:
+    page = FPDF()
+    return page.w - page.l_margin - page.r_margin
+
+
+def _content_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def prepare_images(image_files: Sequence[str], width_mm: float, dpi: int, quality: int = 85,
+                   cache_dir: str = DEFAULT_IMAGE_CACHE_DIR) -> Dict[str, str]:
+    """
+    Image stage of the reporter: maps every image file to a version resampled to `dpi` at the
+    printed width `width_mm` and re-encoded as JPEG with `quality`.
+
+    Files are identified by their content hash, so identical images (e.g. the same AVL plot
+    saved twice) are processed and embedded once, and the results are cached in `cache_dir`
+    across report runs. Images that cannot be read are returned unchanged.
+    """
+    try:
+        from PIL import Image
+    except ImportError:  # Pillow comes with fpdf2, but plain PyFPDF works without it
+        return {img: img for img in image_files}
+
+    os.makedirs(cache_dir, exist_ok=True)
+    max_px = int(width_mm / 25.4 * dpi)
+    prepared = {}
+    for img in dict.fromkeys(image_files):
+        try:
+            target = os.path.join(cache_dir, f'{_content_hash(img)}_{max_px}px_q{quality}.jpeg')
+            if not os.path.isfile(target):
+                with Image.open(img) as im:
+                    im = im.convert('RGB')
+                    if im.width > max_px:
+                        im = im.resize((max_px, round(im.height * max_px / im.width)), Image.LANCZOS)
+                    # write next to the target first, so a parallel run never reads half a file
+                    tmp_target = f'{target}.{os.getpid()}.tmp'
+                    try:
+                        im.save(tmp_target, 'JPEG', quality=quality, optimize=True)
+                        os.replace(tmp_target, target)
+                    finally:
+                        # only left behind when the save or the replace failed
+                        if os.path.exists(tmp_target):
+                            os.remove(tmp_target)
+        except OSError:
+            target = img
+        prepared[img] = target
+    return prepared
+
+
+def _prepared_images(config: ReportConfig) -> List[str]:
+    if config.image_dpi is None:
+        return list(config.image_files)
+    prepared = prepare_images(config.image_files, _usable_width_mm(), config.image_dpi,
+                              config.image_quality, config.image_cache_dir)
+    return [prepared[img] for img in config.image_files]
+
+
+def create_pdf_reports(configs: Sequence[ReportConfig],
+                       max_workers: Optional[int] = None,
+                       comparison: Optional[ReportConfig] = None) -> List[str]:
+    """
+    Generates the PDF reports of many configurations (e.g. one per ConvAnalysis variant) in a
+    process pool and returns the written paths, in the order of `configs`.
+
+    The data of every report is extracted here, in the calling process, because ParaPy objects
+    cannot be sent to the workers. The images are prepared here as well, so images shared by
+    several reports are downscaled once.
+    If `comparison` is given, an extra PDF with the results of all designs side by side is
+    written using its filename, title and output_dir.
+    """
+    datas = [_detached_data(config) for config in configs]
+    jobs = [replace(config, data_object=None, image_files=_prepared_images(config), image_dpi=None)
+            for config in configs]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        paths = list(pool.map(_render_report, jobs, datas))
+
+    if comparison is not None:
+        paths.append(create_comparison_report(comparison, [config.title for config in configs], datas))
+    return paths
+
+
+def create_comparison_report(config: ReportConfig, titles: Sequence[str], datas: Sequence[Mapping]) -> str:
+    """
+    One PDF with a results table that has a column per design. Parameters that a design
+    does not report are left empty.
+    """
+    output_path = _output_path(config)
+    pdf = PDFReport(config.title)
+    pdf.alias_nb_pages()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page('L')  # landscape, to fit more designs next to each other
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(0, 10, config.title, ln=True, align='C')
+    pdf.ln(5)
+
+    keys = list(dict.fromkeys(key for data in datas for key in data))
+    usable_width = pdf.w - pdf.l_margin - pdf.r_margin
+    key_width = usable_width * 0.25
+    col_width = (usable_width - key_width) / max(len(titles), 1)
+    row_height = pdf.font_size * 2
+    pdf.set_fill_color(200, 200, 200)
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(key_width, row_height, 'Parameter', border=1, fill=True)
+    for title in titles:
+        pdf.cell(col_width, row_height, str(title), border=1, fill=True)
+    pdf.ln()
+    pdf.set_font('Arial', '', 10)
+    for key in keys:
+        pdf.cell(key_width, row_height, str(key), border=1)
+        for data in datas:
+            pdf.cell(col_width, row_height, str(data[key]) if key in data else '', border=1)
+        pdf.ln()
+
+    pdf.output(output_path)
+    return output_path
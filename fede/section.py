@@ -1,11 +1,32 @@
-from parapy.geom import GeomBase, ScaledCurve
-from parapy.core import Input, Attribute, Part, DynamicType, child
+from functools import lru_cache
+from parapy.geom import GeomBase, ScaledCurve, TransformedCurve, Point, Position
+from parapy.core import Input, Attribute, Part, child
 from parapy.core.validate import AdaptedValidator
 import kbeutils.avl as avl
-from kbeutils.geom import Naca5AirfoilCurve, Naca4AirfoilCurve
+from kbeutils.geom import AirfoilCurve, fit_cst_airfoil, naca_4_airfoil, naca_5_airfoil
 from parapy.geom import GeomBase, LoftedShell, MirroredSurface, rotate
 
 _len_4_or_5 = AdaptedValidator(lambda a: 4 <= len(a) <= 5)
+ORIGIN = Position(Point(0, 0, 0))
+
+
+@lru_cache(maxsize=None)
+def unit_coordinates(designation, n_points=200):
+    """(x, y, z) points of the NACA airfoil of unit chord, computed once per designation (the
+    fuselage, booms and landing gear all use "0000"). Only plain data is shared: the sessions of
+    the web GUI build their models on threads of their own, and ParaPy slots are not evaluated
+    thread-safely, so every section builds its own curve from these points."""
+    naca = naca_5_airfoil if len(designation) == 5 else naca_4_airfoil
+    return tuple(naca(designation, n_points))
+
+
+@lru_cache(maxsize=None)
+def cst_coefficients(designation, order=5):
+    """(upper, lower) CST coefficients of unit_coordinates(designation), fitted once"""
+    x, _, z = zip(*unit_coordinates(designation))
+    upper, lower = fit_cst_airfoil(x, z, (order, order))
+    return tuple(upper), tuple(lower)
+
 
 class Section(GeomBase):
     # This Input has a validator!
@@ -31,31 +52,38 @@ class Section(GeomBase):
 
     @Part
     def airfoil(self):
-        return DynamicType(type=Naca5AirfoilCurve if len(self.airfoil_name) == 5
-                                                     else Naca4AirfoilCurve,
-                           designation=self.airfoil_name,
-                           mesh_deflection=0.00001,
-                           hidden=True,
-                           # cst_order_upper=3, # Changing the order of the CST coefficients for each surface
-                           # cst_order_lower=2, # of the airfoil. This is just an example, and they are usually the
-                                                # same for both upper and lower surfaces.
-                           )
+        """unit chord airfoil at the origin, from the cached points (see unit_coordinates).
+        Scaling and placing it is done by `curve`"""
+        return AirfoilCurve(coordinates=unit_coordinates(self.airfoil_name),
+                            mesh_deflection=0.00001,
+                            hidden=True,
+                            # cst_order_upper=3, # Changing the order of the CST coefficients for each surface
+                            # cst_order_lower=2, # of the airfoil. This is just an example, and they are usually the
+                                                 # same for both upper and lower surfaces.
+                            )
     @Attribute
     def cst_coeffs_upper(self):
         """Upper CST Coefficients of the airfoil. These can be useful in applications like Q3D, which
         require CST coefficients to analyze wings."""
-        return self.airfoil.cst_upper
+        return list(cst_coefficients(self.airfoil_name)[0])
     @Attribute
     def cst_coeffs_lower(self):
         """Lower CST Coefficients of the airfoil"""
-        return self.airfoil.cst_lower
+        return list(cst_coefficients(self.airfoil_name)[1])
     @Part(in_tree=False)
-    def curve(self):
-        """The actual airfoil curve"""
+    def unit_curve(self):
+        """The airfoil scaled to the chord, still at the origin"""
         return ScaledCurve(self.airfoil,
-                           self.position.point,
+                           ORIGIN.point,
                            self.chord,
                            mesh_deflection=0.00001)
+    @Part(in_tree=False)
+    def curve(self):
+        """The actual airfoil curve, moved from the origin to the section"""
+        return TransformedCurve(curve_in=self.unit_curve,
+                                from_position=ORIGIN,
+                                to_position=self.position,
+                                mesh_deflection=0.00001)
     @Part
     def avl_section(self):
         """Defines the section for AVL (zero-thickness profile, representing
@@ -0,0 +1,151 @@
+import threading
+from collections import OrderedDict
+
+from fede.memory import rss
+
+"""Pool of pre-built models, so that every web GUI session works on its own model.
+
+A single module-level model is shared (and edited) by every browser session. The pool
+builds a template model from a set of inputs and warms it up, i.e. evaluates the slots
+the GUI needs anyway. Sessions get a clone of the template: a new instance with the
+template's current inputs, warmed the same way. A ParaPy dependency graph cannot be
+shared between models, so this is copy-on-write at the level of the inputs: a clone
+only diverges from the template once its session changes an input. `spares` clones are
+kept ready, so a new session does not wait for the model build. Clones are built
+outside the pool's lock, and `fill_in_background` builds the spares on a thread of
+their own; every model is only used by one thread at a time, the one building it and
+then the one of its session.
+
+Sessions are kept in least-recently-used order. When the number of sessions reaches the
+capacity (`max_sessions`, or `memory_cap_mb` divided by the size of the template) the
+least recently used session is evicted: its model is dropped, but its inputs are kept,
+so the session gets a clone with its own edits when it comes back."""
+
+
+def _warm(model, paths):
+    """evaluates the dotted `paths` (e.g. 'right_wing.mac') of `model`"""
+    for path in paths:
+        obj = model
+        for step in path.split('.'):
+            obj = obj[int(step)] if step.isdigit() else getattr(obj, step)
+    return model
+
+
+class ModelPool:
+
+    def __init__(self, factory, inputs, warm_paths=(), spares=1, max_sessions=None,
+                 memory_cap_mb=None, model_size_mb=None):
+        self.factory = factory  # class (or function) building a model from `inputs`
+        self.inputs = dict(inputs)
+        self.warm_paths = list(warm_paths)
+        self.spares = spares  # number of clones kept ready for new sessions
+
+        self._lock = threading.RLock()
+        self._sessions = OrderedDict()  # session key -> model, least recently used first
+        self._evicted = {}  # session key -> inputs of the model it lost
+        self._ready = []
+        self._building = 0  # spares being built outside the lock
+        self._filler = None  # thread of fill_in_background
+        self.evictions = 0
+
+        self.template, measured_mb = self._build_template()
+        self.model_size_mb = model_size_mb or measured_mb
+        self.capacity = self._capacity(max_sessions, memory_cap_mb)
+        self.fill()
+
+    def _build_template(self):
+        # the template doubles as a measurement of the memory a model takes, Python objects
+        # and OCC shapes alike (the growth of the resident set size, only on Linux)
+        before = rss()
+        template = _warm(self.factory(**self.inputs), self.warm_paths)
+        after = rss()
+        if before is None or after is None or after <= before:
+            return template, None
+        return template, (after - before) / 2 ** 20
+
+    def _capacity(self, max_sessions, memory_cap_mb):
+        limits = [max_sessions] if max_sessions is not None else []
+        if memory_cap_mb is not None and self.model_size_mb:
+            # the template and the spares take memory as well
+            models = int(memory_cap_mb // self.model_size_mb) - self.spares - 1
+            limits.append(max(models, 1))
+        return min(limits) if limits else None
+
+    def template_inputs(self):
+        with self._lock:
+            return {name: getattr(self.template, name) for name in self.inputs}
+
+    def clone(self, inputs=None):
+        """warmed model with the inputs of the template, updated with `inputs`"""
+        return _warm(self.factory(**{**self.template_inputs(), **(inputs or {})}),
+                     self.warm_paths)
+
+    def fill(self):
+        """builds clones until `spares` are ready. The lock is only held to count them, so
+        sessions acquiring their model do not wait for the builds."""
+        with self._lock:
+            missing = max(self.spares - len(self._ready) - self._building, 0)
+            self._building += missing
+        for _ in range(missing):
+            model = None
+            try:
+                model = self.clone()
+            finally:
+                with self._lock:
+                    self._building -= 1
+                    if model is not None:
+                        self._ready.append(model)
+
+    def fill_in_background(self):
+        """fill on a daemon thread, unless one is running already. Call it when the server
+        is idle, e.g. after a page was sent."""
+        with self._lock:
+            if self._filler is not None and self._filler.is_alive():
+                return
+            self._filler = threading.Thread(target=self.fill, name='model-pool-fill',
+                                            daemon=True)
+            self._filler.start()
+
+    def acquire(self, key):
+        """the model of session `key`: a spare for a new session, or a clone with its own
+        inputs for a session that was evicted"""
+        with self._lock:
+            if key in self._sessions:
+                self._sessions.move_to_end(key)
+                return self._sessions[key]
+            inputs = self._evicted.pop(key, None)
+            model = self._ready.pop() if self._ready and inputs is None else None
+
+        if model is None:
+            model = self.clone(inputs)
+
+        with self._lock:
+            if key in self._sessions:
+                # a concurrent acquire of the same session was first, keep its model
+                if inputs is None:
+                    self._ready.append(model)
+                self._sessions.move_to_end(key)
+                return self._sessions[key]
+            if self.capacity is not None:
+                while len(self._sessions) >= self.capacity:
+                    self._evict()
+            self._sessions[key] = model
+            return model
+
+    def _evict(self):
+        """drops the model of the least recently used session, keeping its inputs"""
+        key, model = self._sessions.popitem(last=False)
+        self._evicted[key] = {name: getattr(model, name) for name in self.inputs}
+        self.evictions += 1
+
+    def release(self, key):
+        """drops the model (or the inputs) of a closed session"""
+        with self._lock:
+            self._sessions.pop(key, None)
+            self._evicted.pop(key, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, key):
+        return key in self._sessions
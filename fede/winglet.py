@@ -1,8 +1,10 @@
 from math import radians, tan
 from kbeutils.geom import cst_airfoil_coordinates
+from kbeutils.data import airfoils
 from parapy.geom import LoftedSolid, translate, rotate, FittedCurve, GeomBase
 from parapy.core import Input, Attribute, Part, child
 from fede import Airfoil, Frame, LiftingSurface
+from fede.airfoil import read_airfoil_file
 class Winglet(GeomBase):
     """I will define both a loftedsolid, and the geometry for luis so some wings that move defined as the loft between 5 stations"""
     name: str = Input()
@@ -19,26 +21,68 @@ class Winglet(GeomBase):
     inst_angle: float = Input(0)
     colors: list[str] = Input(["red", "green", "blue", "yellow", "orange"])
     mesh_deflection: float = Input(1e-4)
+    airfoil_dir: str = Input(airfoils.__path__[0])
+    tolerance: float = Input(None)  # max distance between the loft and the sweep/cant/chord law; None: airfoil_number stations
+    smooth: bool = Input(False)  # smooth loft through guide_sections stations instead of a ruled loft
+    guide_sections: int = Input(5)
     @Attribute
     def delta_chords(self):
         return (self.winglet_c_root - self.winglet_c_tip)/self.airfoil_number
+    @Attribute
+    def eta_end(self):
+        """the last station is at (airfoil_number - 1)/airfoil_number of the winglet law, as it always was"""
+        return (self.airfoil_number - 1) / self.airfoil_number
+    @Attribute
+    def max_thickness(self):
+        """largest |z| of the sections, as a fraction of the chord"""
+        return max(abs(z) for name in self.airfoil_names
+                   for z in read_airfoil_file(self.airfoil_dir, name)[1]) * max(self.t_factor_root, self.t_factor_tip)
+    def law_curvature(self, eta):
+        """upper bound of the second derivative (to eta) of any point of the section at eta. The
+        offsets in x and y and the chord are linear in eta, only the z offset (0.3*semi_span*eta)**4 and
+        the cant rotation of -90*eta degrees bend the loft."""
+        z_offset = 12 * (0.3 * self.semi_span) ** 4 * eta ** 2
+        rate = radians(90)  # cant angle per unit eta
+        cant = self.max_thickness * (self.winglet_c_root * rate ** 2
+                                     + 2 * abs(self.winglet_c_root - self.winglet_c_tip) * rate)
+        return z_offset + cant
+    @Attribute
+    def stations(self):
+        """positions (eta, from 0 to eta_end) of the sections along the winglet law. Adaptive when a
+        tolerance is given: a ruled loft deviates at most h**2/8 * curvature from the law between two
+        stations h apart, so the stations are closer where the law bends more."""
+        if self.smooth:
+            return [self.eta_end * idx / (self.guide_sections - 1) for idx in range(self.guide_sections)]
+        if self.tolerance is None:
+            return [idx / self.airfoil_number for idx in range(self.airfoil_number)]
+        if self.tolerance <= 0:
+            raise ValueError("tolerance must be positive")
+        stations = [0.]
+        while stations[-1] < self.eta_end:
+            eta = stations[-1]
+            step = self.eta_end - eta
+            # the curvature grows with eta, so the bound at the end of the step holds for all of it
+            while step ** 2 / 8 * self.law_curvature(eta + step) > self.tolerance:
+                step *= 0.8
+            stations.append(min(eta + step, self.eta_end))
+        return stations
     @Part
     def airfoil_profiles(self):
-        return Airfoil(quantify = self.airfoil_number, #this is the part that we implement to add a "number " to it in case we want to change it
+        return Airfoil(quantify = len(self.stations), #one section per station of the winglet law
                      color=self.colors[child.index % len(self.colors)], #a way to assign a continuous pattern of colors
-                     position = rotate(translate(self.position, 'x', -(self.semi_span * tan(radians(self.winglet_sweep))/self.airfoil_number)*child.index,
-                                                 'y', -(self.semi_span / self.airfoil_number)*child.index, 'z',
-                                                 (0.3*(self.semi_span / self.airfoil_number)*child.index)**4),
-                                       'x', -(90/self.airfoil_number) * child.index, deg=True), #divides 360 based on how many and translates iteratively
+                     position = rotate(translate(self.position, 'x', -self.semi_span * tan(radians(self.winglet_sweep)) * self.stations[child.index],
+                                                 'y', -self.semi_span * self.stations[child.index], 'z',
+                                                 (0.3 * self.semi_span * self.stations[child.index])**4),
+                                       'x', -90 * self.stations[child.index], deg=True), #sweep, cant and chord follow the law at the station
                      airfoil_name=self.airfoil_names[child.index % len(self.airfoil_names)], #in this case we can define the names
-                     chord=self.winglet_c_root - (self.delta_chords * child.index),
+                     chord=self.winglet_c_root - (self.winglet_c_root - self.winglet_c_tip) * self.stations[child.index],
                      thickness_factor=self.t_factor_root,
+                     airfoil_dir=self.airfoil_dir,
                      mesh_deflection=self.mesh_deflection)
     @Part
     def lofted_winglet(self):
         return LoftedSolid(profiles = self.airfoil_profiles,
-                           ruled = True,)
-
+                           ruled = not self.smooth,)
 
 ########## AVL ##########
 '''
@@ -0,0 +1,15 @@
+"""
+Tests of the fede modules that do not need a model, such as the reporter and the CST
+fitter. The web app has its own tests in ``[directory]/tests``.
+
+    python -m pytest tests
+"""
+
+import pathlib
+import sys
+
+ROOT = pathlib.Path(__file__).parent.parent
+# fede is imported as a package, but also imports its modules by their plain name
+for path in (ROOT, ROOT / "fede"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
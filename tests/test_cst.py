@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("kbeutils.geom")  # imports parapy, as fede does
+
+from fede.cst import fit
+from kbeutils.data import airfoils
+from kbeutils.geom import fit_cst_airfoil, read_selig_airfoil
+
+AIRFOILS = ["naca2411", "b29root", "b29tip", "ag03", "naca23012"]
+
+
+@pytest.mark.parametrize("order", [3, 5])
+def test_fit_matches_kbeutils(order):
+    coordinates = []
+    for name in AIRFOILS:
+        path = os.path.join(airfoils.__path__[0], name + ".dat")
+        x, _, z = zip(*read_selig_airfoil(path))
+        coordinates.append((x, z))
+
+    coefficients = fit(coordinates, order, cache=False)
+
+    assert coefficients.shape == (len(AIRFOILS), 2, order + 3)
+    for (x, z), (upper, lower) in zip(coordinates, coefficients):
+        expected_upper, expected_lower = fit_cst_airfoil(x, z, order)
+        np.testing.assert_allclose(upper, expected_upper, rtol=0, atol=1e-12)
+        np.testing.assert_allclose(lower, expected_lower, rtol=0, atol=1e-12)
+
+
+def test_cached_fit_is_the_same():
+    path = os.path.join(airfoils.__path__[0], "naca2411.dat")
+    x, _, z = zip(*read_selig_airfoil(path))
+
+    first = fit([(x, z)])
+    assert np.array_equal(fit([(x, z), (x, z)])[1], first[0])
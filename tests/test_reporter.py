@@ -0,0 +1,119 @@
+import pathlib
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fpdf")
+pytest.importorskip("parapy.geom")  # fede imports its models on import
+
+from fede.reporter import SKIPPED_FIELD, FieldData, resolve_path
+
+
+class Counting:
+    """Object whose properties count how often they are evaluated"""
+
+    def __init__(self):
+        self.evaluations = {}
+
+    def _count(self, name, value):
+        self.evaluations[name] = self.evaluations.get(name, 0) + 1
+        return value
+
+    @property
+    def cheap(self):
+        return self._count("cheap", 1)
+
+    @property
+    def expensive(self):
+        return self._count("expensive", 2)
+
+
+def test_resolve_path():
+    data = {
+        "analyses": [SimpleNamespace(l_over_d={"fixed_aoa": 12.5})],
+        "cases": {1: {"cl": 0.4}, "2": {"cl": 0.5}},
+    }
+
+    assert resolve_path(data, "analyses.0.l_over_d.fixed_aoa") == 12.5
+    assert resolve_path(data, "cases.1.cl") == 0.4
+    assert resolve_path(data, "cases.2.cl") == 0.5
+    with pytest.raises(KeyError):
+        resolve_path(data, "cases.3")
+    with pytest.raises(AttributeError):
+        resolve_path(data, "analyses.0.l_over_l")
+
+
+def test_field_data_is_lazy():
+    source = Counting()
+    data = FieldData(source, {"Cheap": "cheap", "Expensive": "expensive"})
+
+    assert "Cheap: {Cheap}".format_map(data) == "Cheap: 1"
+    assert data["Cheap"] == 1
+    assert source.evaluations == {"cheap": 1}
+    assert set(data.timings) == {"Cheap"}
+
+    data.detach()
+    assert source.evaluations == {"cheap": 1, "expensive": 1}
+    assert data.source is None
+    assert dict(data) == {"Cheap": 1, "Expensive": 2}
+
+
+def test_field_data_budget():
+    source = Counting()
+    data = FieldData(source, {"Cheap": "cheap", "Expensive": "expensive"}, budget=0)
+
+    assert data["Expensive"] == SKIPPED_FIELD
+    assert source.evaluations == {}
+
+
+def _write_image(path, color, size=(400, 200)):
+    from PIL import Image
+
+    Image.new("RGB", size, color).save(path, "PNG")
+    return str(path)
+
+
+def test_prepare_images_dedup(tmp_path):
+    pytest.importorskip("PIL")
+    from fede.reporter import prepare_images
+
+    first = _write_image(tmp_path / "first.png", "red")
+    copy = _write_image(tmp_path / "copy.png", "red")
+    other = _write_image(tmp_path / "other.png", "blue")
+    cache_dir = tmp_path / "cache"
+
+    # 100 mm at 50 dpi is 196 px
+    prepared = prepare_images([first, copy, other, first], 100, 50, cache_dir=str(cache_dir))
+
+    assert list(prepared) == [first, copy, other]
+    assert prepared[first] == prepared[copy] != prepared[other]
+    assert sorted(p.name for p in cache_dir.iterdir()) == sorted(
+        {pathlib.Path(prepared[first]).name, pathlib.Path(prepared[other]).name}
+    )
+    from PIL import Image
+
+    with Image.open(prepared[first]) as im:
+        assert im.size == (196, 98)
+
+    # prepared again from the cache
+    assert prepare_images([copy], 100, 50, cache_dir=str(cache_dir)) == {copy: prepared[copy]}
+
+
+def test_prepare_images_failed_save(tmp_path, monkeypatch):
+    pytest.importorskip("PIL")
+    from PIL import Image
+    from fede.reporter import prepare_images
+
+    image = _write_image(tmp_path / "image.png", "red")
+    cache_dir = tmp_path / "cache"
+
+    def failing_save(self, path, *args, **kwargs):
+        pathlib.Path(path).write_bytes(b"half a jpeg")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(Image.Image, "save", failing_save)
+    prepared = prepare_images([image], 100, 50, cache_dir=str(cache_dir))
+
+    # the original is embedded instead, and no temporary file is left behind
+    assert prepared == {image: image}
+    assert list(cache_dir.iterdir()) == []
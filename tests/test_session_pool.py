@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("parapy.geom")  # fede imports its models on import
+
+from fede.session_pool import ModelPool
+
+
+class Model:
+    """Stand-in for a ParaPy model, counting how many were built"""
+
+    built = 0
+
+    def __init__(self, span, chord):
+        Model.built += 1
+        self.span = span
+        self.chord = chord
+
+
+def test_sessions_get_clones_of_the_template():
+    pool = ModelPool(Model, dict(span=10, chord=2), spares=1)
+    pool.template.span = 12
+
+    first = pool.acquire("first")
+    assert first is not pool.template
+    assert pool.acquire("first") is first
+    # the spare was built before the template changed, later clones follow it
+    assert first.span == 10
+    assert pool.acquire("second").span == 12
+
+
+def test_lru_eviction_keeps_the_inputs():
+    pool = ModelPool(Model, dict(span=10, chord=2), spares=0, max_sessions=2)
+    first = pool.acquire("first")
+    first.span = 15
+    pool.acquire("second")
+    pool.acquire("first")  # second is now the least recently used
+    pool.acquire("third")
+
+    assert pool.evictions == 1
+    assert "second" not in pool and "first" in pool
+    pool.acquire("second")  # evicts first
+    assert pool.evictions == 2 and "first" not in pool
+
+    # first comes back with a new model that has its edits
+    rebuilt = pool.acquire("first")
+    assert rebuilt is not first
+    assert (rebuilt.span, rebuilt.chord) == (15, 2)
+
+
+def test_memory_cap():
+    pool = ModelPool(Model, dict(span=10, chord=2), spares=1, memory_cap_mb=500,
+                     model_size_mb=100)
+    # five models fit, the template and the spare are two of them
+    assert pool.capacity == 3
+
+
+def test_fill_in_background():
+    pool = ModelPool(Model, dict(span=10, chord=2), spares=0)
+    pool.spares = 2
+    pool.fill_in_background()
+    pool._filler.join()
+    assert len(pool._ready) == 2